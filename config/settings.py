@@ -90,6 +90,48 @@ DATABASES = {
 STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY')
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY')
 
+# HTTP-клиент Stripe: пул keep-alive соединений, таймауты (сек.) и число повторов
+STRIPE_HTTP_POOL_SIZE = int(os.getenv('STRIPE_HTTP_POOL_SIZE', 10))
+STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', 3))
+STRIPE_READ_TIMEOUT = float(os.getenv('STRIPE_READ_TIMEOUT', 10))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', 2))
+# Адрес API Stripe (например, локальный фейковый сервер для бенчмарков)
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')
+
+# "fake" — in-memory имитация Stripe (lms.fake_stripe) для нагрузочных тестов,
+# с задержкой каждого вызова и долей сетевых ошибок
+STRIPE_BACKEND = os.getenv('STRIPE_BACKEND', 'stripe')
+STRIPE_FAKE_LATENCY_MS = float(os.getenv('STRIPE_FAKE_LATENCY_MS', 0))
+STRIPE_FAKE_ERROR_RATE = float(os.getenv('STRIPE_FAKE_ERROR_RATE', 0))
+
+# Секрет подписи вебхуков Stripe. Если задан, статусы платежей обновляются
+# вебхуком, а check_status отвечает из локальной записи без запроса в Stripe
+STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
+
+# Сколько секунд check_status переиспользует статус незавершённого платежа (0 — без кэша)
+STRIPE_STATUS_CACHE_TIMEOUT = int(os.getenv('STRIPE_STATUS_CACHE_TIMEOUT', 5))
+
+# Асинхронное создание сессии оплаты: create_payment сразу отвечает 202,
+# сессия Stripe создаётся в фоновом пуле потоков (lms.tasks)
+STRIPE_ASYNC_CHECKOUT = os.getenv('STRIPE_ASYNC_CHECKOUT', 'False') == 'True'
+# Пул фоновых задач lms.tasks (сессии оплаты, уведомления подписчиков)
+LMS_TASK_WORKERS = int(os.getenv('LMS_TASK_WORKERS', 4))
+# Выполнять фоновые задачи сразу в текущем потоке (для тестов и отладки)
+LMS_TASKS_EAGER = False
+# Сколько секунд create_payment возвращает уже созданный ожидающий платёж
+# за тот же курс или урок вместо новой сессии Stripe (0 — не переиспользовать)
+PAYMENT_REUSE_WINDOW = int(os.getenv('PAYMENT_REUSE_WINDOW', 1800))
+# Поиск платежей по пользователю: trigram (ILIKE по триграммным индексам PostgreSQL),
+# prefix (точный email или префикс username/email) или auto — по СУБД
+PAYMENT_SEARCH_MODE = os.getenv('PAYMENT_SEARCH_MODE', 'auto')
+
+# Уведомления подписчиков об изменении курса: правки за COURSE_NOTIFICATION_DEBOUNCE
+# секунд объединяются в одно письмо, письма отправляются пачками по COURSE_NOTIFICATION_BATCH_SIZE.
+# Истёкшие окна проверяет одна периодическая задача раз в COURSE_NOTIFICATION_SWEEP_INTERVAL секунд
+COURSE_NOTIFICATION_DEBOUNCE = int(os.getenv('COURSE_NOTIFICATION_DEBOUNCE', 300))
+COURSE_NOTIFICATION_SWEEP_INTERVAL = int(os.getenv('COURSE_NOTIFICATION_SWEEP_INTERVAL', 60))
+COURSE_NOTIFICATION_BATCH_SIZE = int(os.getenv('COURSE_NOTIFICATION_BATCH_SIZE', 100))
+
 # Stripe API version
 STRIPE_API_VERSION = '2025-09-30'
 
@@ -149,6 +191,21 @@ REST_FRAMEWORK = {
 
 AUTH_USER_MODEL = "users.User"
 
+# Режим пагинации курсов и уроков: "page" (номер страницы) или "cursor" (keyset по id)
+LMS_PAGINATION_MODE = os.getenv("LMS_PAGINATION_MODE", "page")
+
+# Конфигурация текстового поиска PostgreSQL для индекса курсов и уроков
+LMS_SEARCH_CONFIG = os.getenv("LMS_SEARCH_CONFIG", "russian")
+
+# Время хранения роли пользователя (модератор или нет) в кэше между запросами, сек.
+# 0 — роль вычисляется один раз на запрос, без общего кэша
+USERS_ROLE_CACHE_TIMEOUT = int(os.getenv("USERS_ROLE_CACHE_TIMEOUT", 0))
+# Сколько секунд хранится множество курсов, на которые подписан пользователь
+# (is_subscribed в списке курсов); 0 — без кэша, is_subscribed считается подзапросом EXISTS
+LMS_SUBSCRIPTIONS_CACHE_TIMEOUT = int(os.getenv("LMS_SUBSCRIPTIONS_CACHE_TIMEOUT", 0))
+# Сколько курсов хранит рейтинг популярных курсов по каждому показателю и окну
+LMS_RANKING_SIZE = int(os.getenv("LMS_RANKING_SIZE", 100))
+
 
 # # Настройки срока действия токенов
 SIMPLE_JWT = {
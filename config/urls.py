@@ -12,7 +12,10 @@ from lms.views import (
     subscribe_to_course,
     unsubscribe_from_course,
     CourseSubscriptionView,
-    PaymentViewSet
+    CourseSubscriptionBulkView,
+    PaymentViewSet,
+    SearchView,
+    stripe_webhook,
 )
 from users.views import UserCreateAPIView, UserUpdateAPIView
 
@@ -27,6 +30,8 @@ urlpatterns = [
 
     # API через DRF Router
     path("api/", include(router.urls)),
+    # Полнотекстовый поиск по курсам и урокам
+    path("api/search/", SearchView.as_view(), name="search"),
 
     # Пользователи
     path("users/<int:pk>/",
@@ -58,6 +63,15 @@ urlpatterns = [
         CourseSubscriptionView.as_view(),
         name="course-subscription",
     ),
+    path("course/subscription/bulk/",
+        CourseSubscriptionBulkView.as_view(),
+        name="course-subscription-bulk",
+    ),
+    # Вебхук Stripe
+    path("payments/webhook/",
+        stripe_webhook,
+        name="stripe-webhook",
+    ),
     path("docs/",
          include("docs.urls")
     ),
@@ -0,0 +1,120 @@
+"""
+In-memory замена stripe.StripeClient для нагрузочного тестирования.
+
+Поддерживает вызовы, которые делает StripeService: client.v1.products.create,
+client.v1.prices.create и client.v1.checkout.sessions.create/retrieve/list.
+Включается настройкой STRIPE_BACKEND = "fake"; задержка и доля ошибок
+задаются STRIPE_FAKE_LATENCY_MS и STRIPE_FAKE_ERROR_RATE.
+"""
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import stripe
+
+FAKE_API_KEY = "sk_test_fake"
+
+
+def _construct(values):
+    return stripe.StripeObject.construct_from(values, FAKE_API_KEY)
+
+
+class FakeStripeClient:
+    def __init__(self, latency_ms: float = 0, error_rate: float = 0.0, seed=None):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._objects = {}
+        self._idempotent = {}
+
+        self.v1 = SimpleNamespace(
+            products=_FakeCreateService(self, "product", "prod"),
+            prices=_FakeCreateService(self, "price", "price"),
+            checkout=SimpleNamespace(sessions=_FakeSessionService(self)),
+        )
+
+    def _simulate_network(self):
+        """Задержка и случайная сетевая ошибка, как у реального вызова API."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if failed:
+            raise stripe.APIConnectionError("Fake Stripe: simulated network error")
+
+    def _create(self, object_type, prefix, values, options=None):
+        self._simulate_network()
+        idempotency_key = (options or {}).get("idempotency_key")
+        with self._lock:
+            if idempotency_key and idempotency_key in self._idempotent:
+                return self._objects[self._idempotent[idempotency_key]]
+            object_id = f"{prefix}_fake_{uuid.uuid4().hex}"
+            obj = _construct({"id": object_id, "object": object_type, "created": int(time.time()), **values})
+            self._objects[object_id] = obj
+            if idempotency_key:
+                self._idempotent[idempotency_key] = object_id
+            return obj
+
+    def _retrieve(self, object_type, object_id):
+        self._simulate_network()
+        obj = self._objects.get(object_id)
+        if obj is None or obj["object"] != object_type:
+            raise stripe.InvalidRequestError(f"No such {object_type}: '{object_id}'", "id")
+        return obj
+
+    def complete_session(self, session_id: str, paid: bool = True):
+        """Имитация действий покупателя: оплата (paid=True) или истечение сессии."""
+        session = self._objects[session_id]
+        if paid:
+            session["status"], session["payment_status"] = "complete", "paid"
+        else:
+            session["status"] = "expired"
+        return session
+
+
+class _FakeCreateService:
+    def __init__(self, client, object_type, prefix):
+        self._client = client
+        self._object_type = object_type
+        self._prefix = prefix
+
+    def create(self, params=None, options=None):
+        return self._client._create(self._object_type, self._prefix, params or {}, options)
+
+
+class _FakeSessionService:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, params=None, options=None):
+        values = {**(params or {}), "status": "open", "payment_status": "unpaid"}
+        session = self._client._create("checkout.session", "cs", values, options)
+        session["url"] = f"https://checkout.stripe.com/c/pay/{session.id}"
+        return session
+
+    def retrieve(self, session_id, params=None, options=None):
+        return self._client._retrieve("checkout.session", session_id)
+
+    def list(self, params=None, options=None):
+        """Сессии от новых к старым с фильтром created.gte и постраничным starting_after."""
+        self._client._simulate_network()
+        params = params or {}
+        created_gte = params.get("created", {}).get("gte", 0)
+        limit = params.get("limit", 10)
+
+        with self._client._lock:
+            sessions = [
+                obj for obj in self._client._objects.values()
+                if obj["object"] == "checkout.session" and obj["created"] >= created_gte
+            ]
+        sessions.sort(key=lambda obj: (obj["created"], obj["id"]), reverse=True)
+
+        starting_after = params.get("starting_after")
+        if starting_after:
+            ids = [obj["id"] for obj in sessions]
+            sessions = sessions[ids.index(starting_after) + 1:] if starting_after in ids else []
+
+        return SimpleNamespace(data=sessions[:limit], has_more=len(sessions) > limit)
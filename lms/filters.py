@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import SearchFilter
+
+# Верхняя граница для поиска по префиксу диапазоном в SQLite: term <= value < term + PREFIX_END.
+# Корректна только при побайтовой сортировке строк (BINARY), как в SQLite по умолчанию
+PREFIX_END = "\U0010ffff"
+
+
+class PaymentSearchFilter(SearchFilter):
+    """
+    Поиск платежей по username и email пользователя (?search=).
+
+    Режим задаётся PAYMENT_SEARCH_MODE:
+    - "trigram" — ILIKE '%...%', как у SearchFilter; на PostgreSQL его обслуживают
+      триграммные GIN-индексы на users_user (миграция users 0003);
+    - "prefix" — точное совпадение email (если в запросе есть "@") или префикс
+      username/email с учётом регистра. На SQLite префикс ищется диапазоном по
+      уникальным индексам; на остальных СУБД — через LIKE 'term%' (startswith):
+      при лингвистической сортировке диапазон не ограничивает префикс, а на
+      PostgreSQL такой LIKE обслуживают индексы *_like (varchar_pattern_ops),
+      которые Django создаёт для уникальных username и email;
+    - "auto" — "trigram" на PostgreSQL, иначе "prefix".
+    """
+
+    def get_search_mode(self, queryset):
+        mode = getattr(settings, "PAYMENT_SEARCH_MODE", "auto")
+        if mode == "auto":
+            return "trigram" if connections[queryset.db].vendor == "postgresql" else "prefix"
+        return mode
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or self.get_search_mode(queryset) == "trigram":
+            return super().filter_queryset(request, queryset, view)
+
+        vendor = connections[queryset.db].vendor
+        users = get_user_model().objects.all()
+        for term in terms:
+            if "@" in term:
+                users = users.filter(email=term)
+            else:
+                users = users.filter(self.prefix_q("username", term, vendor) | self.prefix_q("email", term, vendor))
+        return queryset.filter(user__in=users.values("pk"))
+
+    @staticmethod
+    def prefix_q(field, term, vendor):
+        """Условие «field начинается с term» в форме, которую СУБД ищет по индексу."""
+        if vendor == "sqlite":
+            return Q(**{f"{field}__gte": term, f"{field}__lt": term + PREFIX_END})
+        return Q(**{f"{field}__startswith": term})
@@ -0,0 +1,89 @@
+import itertools
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from lms.models import Course
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк create_payment и check_status с in-memory Stripe (STRIPE_BACKEND = fake). "
+        "Данные создаются в транзакции и откатываются после замера"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--latency-ms", type=float, default=0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--status-cache", type=int, default=0, help="STRIPE_STATUS_CACHE_TIMEOUT на время замера")
+
+    def handle(self, *args, **options):
+        overrides = {
+            "STRIPE_BACKEND": "fake",
+            "STRIPE_FAKE_LATENCY_MS": options["latency_ms"],
+            "STRIPE_FAKE_ERROR_RATE": options["error_rate"],
+            "STRIPE_STATUS_CACHE_TIMEOUT": options["status_cache"],
+            "STRIPE_WEBHOOK_SECRET": None,
+            "STRIPE_ASYNC_CHECKOUT": False,
+            # Каждый запрос должен создавать новую сессию
+            "PAYMENT_REUSE_WINDOW": 0,
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        with override_settings(**overrides), transaction.atomic():
+            results = self.run(options["requests"])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'endpoint':<15}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for endpoint, (throughput, p50, p95, errors) in results.items():
+            self.stdout.write(f"{endpoint:<15}{throughput:>10.1f}{p50:>10.2f}{p95:>10.2f}{errors:>8}")
+
+    def run(self, requests):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f"benchmark_{suffix}", email=f"benchmark_{suffix}@example.com")
+        course = Course.objects.create(name=f"Benchmark {suffix}", price=1000, owner=user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        create_url = reverse("payment-create-payment")
+        payment_ids = []
+
+        def create_payment():
+            response = client.post(create_url, {"course": course.pk})
+            if response.status_code == 201:
+                payment_ids.append(response.data["id"])
+            return response.status_code == 201
+
+        results = {"create_payment": self.measure(create_payment, requests)}
+        if payment_ids:
+            status_urls = itertools.cycle(
+                [reverse("payment-check-status", args=[payment_id]) for payment_id in payment_ids]
+            )
+            results["check_status"] = self.measure(
+                lambda: client.get(next(status_urls)).status_code == 200, requests
+            )
+        return results
+
+    @staticmethod
+    def measure(call, requests):
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            call_started = time.perf_counter()
+            if not call():
+                errors += 1
+            latencies.append((time.perf_counter() - call_started) * 1000)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        return requests / elapsed, statistics.median(latencies), p95, errors
@@ -0,0 +1,109 @@
+import json
+import socket
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management import BaseCommand
+from django.test import override_settings
+
+from lms.stripe_services import StripeService, build_stripe_client
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    """Минимальный фейковый API Stripe: создание и получение checkout-сессий"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        # Заголовки и тело уходят отдельными пакетами: без TCP_NODELAY на keep-alive
+        # соединениях ответ ждёт delayed ACK клиента
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, payload):
+        time.sleep(self.server.latency)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        self._respond(
+            {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+                "payment_status": "unpaid",
+            }
+        )
+
+    def do_GET(self):
+        session_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        self._respond({"id": session_id, "object": "checkout.session", "payment_status": "unpaid"})
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк клиента Stripe против локального фейкового сервера: общий пул соединений против клиента на вызов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--latency-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStripeHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.latency = options["latency_ms"] / 1000
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        try:
+            with override_settings(STRIPE_SECRET_KEY="sk_test_benchmark", STRIPE_HTTP_POOL_SIZE=options["concurrency"]):
+                shared = StripeService(client=build_stripe_client(api_base))
+                results = [
+                    ("pooled", self.run(server, lambda: shared, options)),
+                    ("per-call", self.run(server, lambda: StripeService(client=build_stripe_client(api_base)), options)),
+                ]
+        finally:
+            server.shutdown()
+
+        self.stdout.write(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'conns':>8}")
+        for mode, (throughput, p50, p95, connections) in results:
+            self.stdout.write(f"{mode:<10}{throughput:>10.1f}{p50:>10.2f}{p95:>10.2f}{connections:>8}")
+
+    def run(self, server, get_service, options):
+        server.connections = 0
+        latencies = []
+
+        def call(_):
+            service = get_service()
+            started = time.perf_counter()
+            service.create_session(
+                price_id="price_benchmark",
+                success_url="http://localhost/success/",
+                cancel_url="http://localhost/cancel/",
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            list(executor.map(call, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        return options["requests"] / elapsed, statistics.median(latencies), p95, server.connections
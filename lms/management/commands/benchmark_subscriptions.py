@@ -0,0 +1,81 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from lms.models import Course, CourseSubscription
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест переключения подписки (POST /course/subscription/) из многих потоков: "
+        "пропускная способность, ошибки и согласованность subscribers_count. "
+        "Работает с настроенной БД и удаляет созданные данные после замера"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=50, help="Переключений на поток")
+        parser.add_argument("--users", type=int, default=4, help="Пользователей, переключающих один курс")
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create_user(username=f"benchmark_{suffix}_{i}", email=f"benchmark_{suffix}_{i}@example.com")
+            for i in range(options["users"])
+        ]
+        course = Course.objects.create(name=f"Benchmark {suffix}", owner=users[0])
+        url = reverse("course-subscription")
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(index):
+            client = APIClient()
+            client.force_authenticate(users[index % len(users)])
+            try:
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    try:
+                        response = client.post(url, {"course": course.pk}, format="json")
+                        failed = response.status_code != 200
+                    except Exception as e:  # IntegrityError, блокировки БД и т.п.
+                        failed = True
+                        response = e
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                        if failed:
+                            errors.append(response)
+            finally:
+                close_old_connections()
+
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+                    list(executor.map(worker, range(options["threads"])))
+                elapsed = time.perf_counter() - started
+
+            course.refresh_from_db()
+            actual = CourseSubscription.objects.filter(course=course).count()
+        finally:
+            course.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        latencies.sort()
+        self.stdout.write(
+            f"{len(latencies)} toggles in {elapsed:.2f}s: {len(latencies) / elapsed:.1f} req/s, "
+            f"p50 {statistics.median(latencies):.2f} ms, p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms"
+        )
+        self.stdout.write(f"errors: {len(errors)}" + (f" (first: {errors[0]!r})" if errors else ""))
+        style = self.style.SUCCESS if course.subscribers_count == actual else self.style.ERROR
+        self.stdout.write(style(f"subscribers_count {course.subscribers_count}, subscriptions {actual}"))
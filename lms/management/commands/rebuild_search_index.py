@@ -0,0 +1,41 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from lms import search
+from lms.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    help = "Пересборка поискового индекса курсов и уроков пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            raise CommandError("Полнотекстовый поиск не поддерживается для этой СУБД")
+
+        batch_size = options["batch_size"]
+        indexed = {}
+        # Одна транзакция: поиск не видит наполовину очищенный индекс
+        with transaction.atomic():
+            search.clear_index()
+            for kind, model in (("course", Course), ("lesson", Lesson)):
+                indexed[kind] = self.index_model(kind, model, batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuilt: {indexed['course']} courses, {indexed['lesson']} lessons")
+        )
+
+    @staticmethod
+    def index_model(kind, model, batch_size):
+        queryset = model.objects.only("pk", "owner_id", "name", "description").order_by("pk")
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                return total
+            search.index_objects(kind, batch)
+            total += len(batch)
+            last_id = batch[-1].pk
@@ -0,0 +1,44 @@
+from django.core.management import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from lms.models import Course, CourseSubscription, Lesson
+
+
+def count_per_course(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(course=OuterRef("pk"))
+            .order_by()
+            .values("course")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Пересчёт lessons_count и subscribers_count курсов пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = 0
+        updated = 0
+
+        while True:
+            batch = list(
+                Course.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            updated += Course.objects.filter(pk__in=batch).update(
+                lessons_count=count_per_course(Lesson),
+                subscribers_count=count_per_course(CourseSubscription),
+            )
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"Counters recalculated for {updated} courses"))
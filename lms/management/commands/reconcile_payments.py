@@ -0,0 +1,56 @@
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from lms.models import Payment
+from lms.signals import adjust_revenue
+from lms.stripe_services import StripeService
+
+
+class Command(BaseCommand):
+    help = "Сверка ожидающих платежей с недавними checkout-сессиями Stripe"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since-hours", type=float, default=24, help="Сессии, созданные за последние N часов")
+        parser.add_argument("--batch-size", type=int, default=100, help="Размер страницы Session.list (до 100)")
+
+    def handle(self, *args, **options):
+        stripe_service = StripeService()
+        created_gte = int(time.time() - options["since_hours"] * 3600)
+        starting_after = None
+        seen = updated = 0
+
+        while True:
+            page = stripe_service.list_sessions(
+                created_gte=created_gte, limit=options["batch_size"], starting_after=starting_after
+            )
+            sessions = list(page.data)
+            if not sessions:
+                break
+            seen += len(sessions)
+
+            statuses = {session.id: stripe_service.get_session_status(session) for session in sessions}
+            with transaction.atomic():
+                payments = list(
+                    Payment.objects.select_for_update()
+                    .filter(payment_status="pending", stripe_payment_id__in=statuses)
+                    .only("id", "stripe_payment_id", "payment_status", "payment_date", "payment_price", "course", "lesson")
+                )
+                changed = []
+                for payment in payments:
+                    new_status = statuses[payment.stripe_payment_id]
+                    if new_status != payment.payment_status:
+                        payment.payment_status = new_status
+                        changed.append(payment)
+                if changed:
+                    # bulk_update не вызывает сигналы — сводку выручки обновляем сами
+                    Payment.objects.bulk_update(changed, ["payment_status"])
+                    adjust_revenue([payment for payment in changed if payment.payment_status == "paid"])
+                    updated += len(changed)
+
+            if not page.has_more:
+                break
+            starting_after = sessions[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {seen} sessions, updated {updated} payments"))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from lms.models import Course, CourseRanking, CourseSubscription, Payment
+
+
+def count_by_course(queryset):
+    return dict(queryset.order_by().values("course").annotate(total=Count("pk")).values_list("course", "total"))
+
+
+def top_course_ids(counts, size):
+    return sorted(counts, key=lambda course_id: (-counts[course_id], course_id))[:size]
+
+
+class Command(BaseCommand):
+    help = "Пересчёт рейтинга популярных курсов (подписки и оплаты) за окна 7d, 30d и all"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=None, help="Курсов в топе по каждому показателю (по умолчанию LMS_RANKING_SIZE)"
+        )
+
+    def handle(self, *args, **options):
+        size = options["size"] or getattr(settings, "LMS_RANKING_SIZE", 100)
+        now = timezone.now()
+
+        for window, days in CourseRanking.WINDOW_DAYS.items():
+            subscriptions = CourseSubscription.objects.all()
+            payments = Payment.objects.filter(payment_status="paid", course__isnull=False)
+            if days is not None:
+                since = now - timedelta(days=days)
+                subscriptions = subscriptions.filter(created_at__gte=since)
+                payments = payments.filter(payment_date__gte=since)
+
+            subscribers = count_by_course(subscriptions)
+            purchases = count_by_course(payments)
+            course_ids = set(top_course_ids(subscribers, size)) | set(top_course_ids(purchases, size))
+            names = dict(Course.objects.filter(pk__in=course_ids).values_list("pk", "name"))
+
+            rows = [
+                CourseRanking(
+                    window=window,
+                    course_id=course_id,
+                    course_name=name,
+                    subscribers_count=subscribers.get(course_id, 0),
+                    purchases_count=purchases.get(course_id, 0),
+                    refreshed_at=now,
+                )
+                for course_id, name in names.items()
+            ]
+            with transaction.atomic():
+                CourseRanking.objects.filter(window=window).delete()
+                CourseRanking.objects.bulk_create(rows)
+
+            self.stdout.write(self.style.SUCCESS(f"{window}: {len(rows)} courses ranked"))
@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from lms.notifications import send_due_notifications
+
+
+class Command(BaseCommand):
+    help = "Рассылка ожидающих уведомлений об изменении курсов, у которых истекло окно объединения правок"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Отправить все ожидающие уведомления, не дожидаясь окна")
+
+    def handle(self, *args, **options):
+        courses, sent = send_due_notifications(send_all=options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Notified {courses} courses, sent {sent} emails"))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model("lms", "Course")
+    Lesson = apps.get_model("lms", "Lesson")
+    CourseSubscription = apps.get_model("lms", "CourseSubscription")
+
+    def count_of(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(course=OuterRef("pk"))
+                .order_by()
+                .values("course")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+
+    Course.objects.update(
+        lessons_count=count_of(Lesson),
+        subscribers_count=count_of(CourseSubscription),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lms", "0006_course_updated_at_lesson_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="lessons_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Количество уроков"),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="subscribers_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков"),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE lms_search_document (
+        doc_id bigint PRIMARY KEY,
+        owner_id bigint NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX lms_search_document_gin ON lms_search_document USING gin (document)",
+    # doc_id = id * 2 + код типа (0 — курс, 1 — урок), см. lms.search
+    """
+    INSERT INTO lms_search_document (doc_id, owner_id, document)
+    SELECT id * 2, owner_id,
+           setweight(to_tsvector(%(config)s::regconfig, name), 'A')
+           || setweight(to_tsvector(%(config)s::regconfig, coalesce(description, '')), 'B')
+    FROM lms_course
+    """,
+    """
+    INSERT INTO lms_search_document (doc_id, owner_id, document)
+    SELECT id * 2 + 1, owner_id,
+           setweight(to_tsvector(%(config)s::regconfig, name), 'A')
+           || setweight(to_tsvector(%(config)s::regconfig, coalesce(description, '')), 'B')
+    FROM lms_lesson
+    """,
+]
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE lms_search_fts USING fts5(
+        owner_id UNINDEXED, name, description, tokenize = 'unicode61'
+    )
+    """,
+    """
+    INSERT INTO lms_search_fts (rowid, owner_id, name, description)
+    SELECT id * 2, owner_id, name, coalesce(description, '') FROM lms_course
+    """,
+    """
+    INSERT INTO lms_search_fts (rowid, owner_id, name, description)
+    SELECT id * 2 + 1, owner_id, name, coalesce(description, '') FROM lms_lesson
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        params = {"config": getattr(settings, "LMS_SEARCH_CONFIG", "russian")}
+        for sql in POSTGRES_CREATE:
+            schema_editor.execute(sql, params if "%(config)s" in sql else None)
+    elif vendor == "sqlite":
+        for sql in SQLITE_CREATE:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS lms_search_document")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS lms_search_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("lms", "0007_course_lessons_count_course_subscribers_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0009_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='stripe_price_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Сумма цены в Stripe'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='stripe_price_id',
+            field=models.CharField(blank=True, max_length=128, null=True, verbose_name='ID цены в Stripe'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='stripe_product_id',
+            field=models.CharField(blank=True, max_length=128, null=True, verbose_name='ID продукта в Stripe'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='stripe_price_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Сумма цены в Stripe'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='stripe_price_id',
+            field=models.CharField(blank=True, max_length=128, null=True, verbose_name='ID цены в Stripe'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='stripe_product_id',
+            field=models.CharField(blank=True, max_length=128, null=True, verbose_name='ID продукта в Stripe'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0010_stripe_product_and_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True, verbose_name='ID события в Stripe')),
+                ('event_type', models.CharField(max_length=100, verbose_name='Тип события')),
+                ('processed_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата обработки')),
+            ],
+            options={
+                'verbose_name': 'Событие Stripe',
+                'verbose_name_plural': 'События Stripe',
+            },
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='stripe_payment_id',
+            field=models.CharField(blank=True, db_index=True, max_length=128, null=True, verbose_name='ID платежа в Stripe'),
+        ),
+    ]
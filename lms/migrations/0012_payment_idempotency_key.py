@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0011_stripeevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Ключ идемпотентности'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='payment',
+            unique_together={('user', 'idempotency_key')},
+        ),
+    ]
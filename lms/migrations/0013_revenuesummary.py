@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0012_payment_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('payments_count', models.PositiveIntegerField(default=0, verbose_name='Количество платежей')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='lms.course', verbose_name='Курс')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='lms.lesson', verbose_name='Урок')),
+            ],
+            options={
+                'verbose_name': 'Выручка за день',
+                'verbose_name_plural': 'Выручка по дням',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['day'], name='revenue_day_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('lesson__isnull', True)), fields=('day', 'course'), name='revenue_day_course_uniq'), models.UniqueConstraint(condition=models.Q(('course__isnull', True)), fields=('day', 'lesson'), name='revenue_day_lesson_uniq')],
+            },
+        ),
+    ]
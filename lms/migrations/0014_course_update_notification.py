@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0013_revenuesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseUpdateNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Первое изменение')),
+                ('changes_count', models.PositiveIntegerField(default=1, verbose_name='Количество изменений')),
+            ],
+            options={
+                'verbose_name': 'Уведомление об изменении курса',
+                'verbose_name_plural': 'Уведомления об изменении курсов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='coursesubscription',
+            index=models.Index(fields=['course', 'id'], name='subscription_course_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='courseupdatenotification',
+            name='course',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notification', to='lms.course', verbose_name='Курс'),
+        ),
+    ]
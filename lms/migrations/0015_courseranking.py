@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0014_course_update_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('7d', '7 дней'), ('30d', '30 дней'), ('all', 'Всё время')], max_length=8, verbose_name='Окно')),
+                ('course_name', models.CharField(max_length=255, verbose_name='Название курса')),
+                ('subscribers_count', models.PositiveIntegerField(default=0, verbose_name='Новые подписки')),
+                ('purchases_count', models.PositiveIntegerField(default=0, verbose_name='Оплаты')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Дата расчёта')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='lms.course', verbose_name='Курс')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг курса',
+                'verbose_name_plural': 'Рейтинг курсов',
+                'indexes': [models.Index(fields=['window', '-subscribers_count', 'course'], name='ranking_window_subs_idx'), models.Index(fields=['window', '-purchases_count', 'course'], name='ranking_window_purch_idx')],
+                'unique_together': {('window', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    # Хэш не защитный: usedforsecurity=False, чтобы md5 работал и на сборках Python с FIPS
+    return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified для retrieve и list с ответом 304 Not Modified.
+
+    Версия вычисляется по updated_at объектов (для списка — объектов текущей
+    страницы), поэтому на совпадающий If-None-Match ответ отдаётся без сериализации.
+    Last-Modified отдаётся, только если дата изменения покрывает всё, что входит в ETag:
+    у списков удаление объекта не меняет max(updated_at), поэтому у них только ETag.
+    """
+
+    def get_object_version(self, obj):
+        """Части ETag и дата изменения для одного объекта (None — без Last-Modified)."""
+        return (obj.pk, obj.updated_at), obj.updated_at
+
+    def get_list_version(self, objects):
+        """Части ETag для страницы списка, без даты изменения."""
+        page_state = ()
+        if self.paginator is not None and hasattr(self.paginator, "get_page_state"):
+            page_state = self.paginator.get_page_state()
+        parts = (page_state, [self.get_object_version(obj)[0] for obj in objects])
+        return parts, None
+
+    def conditional_response(self, parts, last_modified, build_response):
+        # Параметры запроса (страница, ?fields=, ?expand=) меняют тело ответа
+        etag = make_etag(self.request.get_full_path(), *parts)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        parts, last_modified = self.get_object_version(instance)
+        return self.conditional_response(
+            parts,
+            last_modified,
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = page if page is not None else list(queryset)
+        parts, last_modified = self.get_list_version(objects)
+
+        def build_response():
+            serializer = self.get_serializer(objects, many=True)
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+
+        return self.conditional_response(parts, last_modified, build_response)
@@ -27,14 +27,43 @@ class Course(models.Model):
         verbose_name="Владелец",
     )
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Stripe: продукт и цена переиспользуются между платежами (см. StripeService.get_or_create_price)
+    stripe_product_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID продукта в Stripe")
+    stripe_price_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID цены в Stripe")
+    stripe_price_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Сумма цены в Stripe"
+    )
+    # Счётчики поддерживаются сигналами (см. lms.signals),
+    # пересчитываются командой recalculate_course_counters
+    lessons_count = models.PositiveIntegerField(default=0, verbose_name="Количество уроков")
+    subscribers_count = models.PositiveIntegerField(default=0, verbose_name="Количество подписчиков")
+    # Обновляется и при изменении уроков курса (см. lms.signals)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    COUNTER_FIELDS = ("lessons_count", "subscribers_count")
 
     class Meta:
         verbose_name = "Курс"
         verbose_name_plural = "Курсы"
+        indexes = [
+            # Список курсов владельца в порядке id
+            models.Index(fields=["owner", "id"], name="course_owner_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Счётчики меняются только атомарно через F(), поэтому обычное сохранение
+        # существующего курса не перезаписывает их устаревшими значениями
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Lesson(models.Model):
     course = models.ForeignKey(
@@ -70,10 +99,20 @@ class Lesson(models.Model):
         verbose_name="Владелец",
     )
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    stripe_product_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID продукта в Stripe")
+    stripe_price_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID цены в Stripe")
+    stripe_price_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Сумма цены в Stripe"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
 
     class Meta:
         verbose_name = "Урок"
         verbose_name_plural = "Уроки"
+        indexes = [
+            # Список уроков владельца в порядке id
+            models.Index(fields=["owner", "id"], name="lesson_owner_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course.name} - {self.name}"
@@ -98,6 +137,10 @@ class CourseSubscription(models.Model):
         verbose_name = "Подписка на курс"
         verbose_name_plural = "Подписки на курсы"
         unique_together = ["user", "course"]  # Запрещаем дублирование подписок
+        indexes = [
+            # Подписчики курса по порядку id — постраничный обход для рассылки
+            models.Index(fields=["course", "id"], name="subscription_course_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.course}"
@@ -112,8 +155,12 @@ class Payment(models.Model):
     # Stripe fields
     stripe_product_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID продукта в Stripe")
     stripe_price_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID цены в Stripe")
-    stripe_payment_id = models.CharField(max_length=128, null=True, blank=True, verbose_name="ID платежа в Stripe")
+    stripe_payment_id = models.CharField(
+        max_length=128, null=True, blank=True, db_index=True, verbose_name="ID платежа в Stripe"
+    )
     stripe_payment_url = models.URLField(max_length=512, null=True, blank=True, verbose_name="URL для оплаты в Stripe")
+    # Заголовок Idempotency-Key запроса create_payment
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, verbose_name="Ключ идемпотентности")
 
     PAYMENT_STATUS_CHOICES = (
         ('pending', 'Ожидает оплаты'),
@@ -132,7 +179,116 @@ class Payment(models.Model):
         verbose_name = "Платёж"
         verbose_name_plural = "Платежи"
         ordering = ['-payment_date']
+        unique_together = ('user', 'idempotency_key')
+        indexes = [
+            # Платежи пользователя от новых к старым
+            models.Index(fields=["user", "-payment_date"], name="payment_user_date_idx"),
+        ]
 
     def __str__(self):
         paid_for = self.course if self.course else self.lesson
         return f"Платёж {self.id} от {self.user} за {paid_for}"
+
+
+class StripeEvent(models.Model):
+    """Обработанные события вебхука Stripe (для идемпотентности)"""
+    event_id = models.CharField(max_length=255, unique=True, verbose_name="ID события в Stripe")
+    event_type = models.CharField(max_length=100, verbose_name="Тип события")
+    processed_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата обработки")
+
+    class Meta:
+        verbose_name = "Событие Stripe"
+        verbose_name_plural = "События Stripe"
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id})"
+
+
+class RevenueSummary(models.Model):
+    """
+    Оплаченные платежи за день по курсу или уроку.
+
+    Обновляется при переходе платежа в paid (lms.signals.adjust_revenue),
+    пересобирается командой rebuild_revenue_summary.
+    """
+    day = models.DateField(verbose_name="День")
+    course = models.ForeignKey('Course', on_delete=models.CASCADE, null=True, blank=True, verbose_name="Курс")
+    lesson = models.ForeignKey('Lesson', on_delete=models.CASCADE, null=True, blank=True, verbose_name="Урок")
+    payments_count = models.PositiveIntegerField(default=0, verbose_name="Количество платежей")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Сумма")
+
+    class Meta:
+        verbose_name = "Выручка за день"
+        verbose_name_plural = "Выручка по дням"
+        ordering = ['day']
+        # NULL в course или lesson не участвует в уникальности — отдельное ограничение на каждый вид строк
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "course"], condition=models.Q(lesson__isnull=True), name="revenue_day_course_uniq"
+            ),
+            models.UniqueConstraint(
+                fields=["day", "lesson"], condition=models.Q(course__isnull=True), name="revenue_day_lesson_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="revenue_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day}: {self.course or self.lesson} — {self.amount}"
+
+
+class CourseUpdateNotification(models.Model):
+    """
+    Ожидающее уведомление подписчиков об изменении курса.
+
+    Правки курса и его уроков в пределах окна COURSE_NOTIFICATION_DEBOUNCE
+    копятся в одной строке и рассылаются одним письмом (lms.notifications).
+    """
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, related_name="pending_notification", verbose_name="Курс"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Первое изменение")
+    changes_count = models.PositiveIntegerField(default=1, verbose_name="Количество изменений")
+
+    class Meta:
+        verbose_name = "Уведомление об изменении курса"
+        verbose_name_plural = "Уведомления об изменении курсов"
+
+    def __str__(self):
+        return f"{self.course} ({self.changes_count})"
+
+
+class CourseRanking(models.Model):
+    """
+    Популярность курсов за окно времени: подписки и оплаты.
+
+    Заполняется командой refresh_course_rankings; эндпоинт /api/courses/popular/
+    читает только эту таблицу, поэтому название курса хранится здесь же.
+    """
+    WINDOW_DAYS = {"7d": 7, "30d": 30, "all": None}
+    WINDOW_CHOICES = (
+        ("7d", "7 дней"),
+        ("30d", "30 дней"),
+        ("all", "Всё время"),
+    )
+
+    window = models.CharField(max_length=8, choices=WINDOW_CHOICES, verbose_name="Окно")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+", verbose_name="Курс")
+    course_name = models.CharField(max_length=255, verbose_name="Название курса")
+    subscribers_count = models.PositiveIntegerField(default=0, verbose_name="Новые подписки")
+    purchases_count = models.PositiveIntegerField(default=0, verbose_name="Оплаты")
+    refreshed_at = models.DateTimeField(verbose_name="Дата расчёта")
+
+    class Meta:
+        verbose_name = "Рейтинг курса"
+        verbose_name_plural = "Рейтинг курсов"
+        unique_together = ("window", "course")
+        indexes = [
+            # Топ окна по каждому показателю читается по индексу без сортировки
+            models.Index(fields=["window", "-subscribers_count", "course"], name="ranking_window_subs_idx"),
+            models.Index(fields=["window", "-purchases_count", "course"], name="ranking_window_purch_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.window}: {self.course_name}"
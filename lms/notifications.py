@@ -0,0 +1,105 @@
+"""
+Уведомления подписчиков об изменении курса.
+
+Сохранение курса или урока создаёт ожидающее уведомление — одну строку
+CourseUpdateNotification на курс. Правки в течение COURSE_NOTIFICATION_DEBOUNCE
+секунд только увеличивают changes_count, поэтому подписчик получает одно письмо
+на серию изменений.
+
+Уведомления с истёкшим окном рассылает одна периодическая задача процесса
+(каждые COURSE_NOTIFICATION_SWEEP_INTERVAL секунд) или команда
+send_course_notifications. Рассылка забирает строку удалением (повторный запуск
+ничего не отправит), обходит подписчиков пачками по id и отправляет письма
+пачками через одно соединение почтового бэкенда.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Course, CourseSubscription, CourseUpdateNotification
+from .tasks import run_periodically
+
+
+def schedule_course_notifications(course_ids):
+    """Отметка изменения курсов; при первой правке в окне запускается периодическая рассылка."""
+    course_ids = {course_id for course_id in course_ids if course_id}
+    if not course_ids:
+        return
+
+    pending = set(
+        CourseUpdateNotification.objects.filter(course_id__in=course_ids).values_list("course_id", flat=True)
+    )
+    if pending:
+        CourseUpdateNotification.objects.filter(course_id__in=pending).update(changes_count=F("changes_count") + 1)
+
+    created = False
+    for course_id in course_ids - pending:
+        try:
+            with transaction.atomic():
+                CourseUpdateNotification.objects.create(course_id=course_id)
+        except IntegrityError:
+            # Уведомление успела создать параллельная транзакция
+            continue
+        created = True
+    if created:
+        run_periodically(getattr(settings, "COURSE_NOTIFICATION_SWEEP_INTERVAL", 60), send_due_notifications)
+
+
+def iter_subscriber_emails(course_id, chunk_size):
+    """Email подписчиков курса пачками, по возрастанию id подписки (без OFFSET)."""
+    last_id = 0
+    while True:
+        chunk = list(
+            CourseSubscription.objects.filter(course_id=course_id, pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "user__email")[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield [email for _, email in chunk if email]
+        last_id = chunk[-1][0]
+
+
+def send_course_notification(course_id) -> int:
+    """Рассылка ожидающего уведомления о курсе; возвращает число отправленных писем."""
+    notification = CourseUpdateNotification.objects.filter(course_id=course_id).first()
+    if notification is None:
+        return 0
+    # Забираем уведомление: при параллельном запуске письма отправит только один
+    claimed, _ = CourseUpdateNotification.objects.filter(pk=notification.pk).delete()
+    course = Course.objects.filter(pk=course_id).only("name").first()
+    if not claimed or course is None:
+        return 0
+
+    subject = f"Курс «{course.name}» обновлён"
+    body = (
+        f"В курсе «{course.name}», на который вы подписаны, появились изменения "
+        f"({notification.changes_count}).\n{settings.SITE_URL}{reverse('course-detail', args=[course_id])}"
+    )
+    connection = get_connection()
+    sent = 0
+    for emails in iter_subscriber_emails(course_id, getattr(settings, "COURSE_NOTIFICATION_BATCH_SIZE", 100)):
+        messages = [EmailMessage(subject, body, to=[email], connection=connection) for email in emails]
+        sent += connection.send_messages(messages) or 0
+    return sent
+
+
+def send_due_notifications(send_all=False):
+    """
+    Рассылка уведомлений, у которых истекло окно объединения правок (send_all — всех).
+
+    Возвращает число курсов и число отправленных писем.
+    """
+    notifications = CourseUpdateNotification.objects.all()
+    if not send_all:
+        debounce = getattr(settings, "COURSE_NOTIFICATION_DEBOUNCE", 300)
+        notifications = notifications.filter(created_at__lte=timezone.now() - timedelta(seconds=debounce))
+
+    course_ids = list(notifications.values_list("course_id", flat=True))
+    sent = sum(send_course_notification(course_id) for course_id in course_ids)
+    return len(course_ids), sent
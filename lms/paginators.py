@@ -1,14 +1,61 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
-from rest_framework.pagination import PageNumberPagination
 
+class KeysetModeMixin:
+    """
+    Переключает PageNumberPagination в режим курсора (keyset по id).
 
-class CoursePaginator(PageNumberPagination):
+    Режим включается параметром ?pagination=cursor, наличием ?cursor=...
+    или настройкой LMS_PAGINATION_MODE = "cursor". В этом режиме не выполняется
+    COUNT(*) и не используется OFFSET, поэтому глубокие страницы не замедляются.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_ordering = 'id'
+
+    def use_cursor(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode is None:
+            if CursorPagination.cursor_query_param in request.query_params:
+                return True
+            mode = getattr(settings, 'LMS_PAGINATION_MODE', 'page')
+        return mode == 'cursor'
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.page_size = self.page_size
+        paginator.page_size_query_param = self.page_size_query_param
+        paginator.max_page_size = self.max_page_size
+        paginator.ordering = self.cursor_ordering
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_state(self):
+        """Состояние текущей страницы для вычисления ETag списка."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.has_next, self.cursor_paginator.has_previous
+        return self.page.paginator.count, self.page.number
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CoursePaginator(KeysetModeMixin, PageNumberPagination):
     page_size = 10  # количество элементов на странице
     page_size_query_param = 'page_size'  # параметр для указания количества элементов в запросе
     max_page_size = 50  # максимальное количество элементов на странице
 
 
-class LessonPaginator(PageNumberPagination):
+class LessonPaginator(KeysetModeMixin, PageNumberPagination):
     page_size = 15
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -0,0 +1,181 @@
+"""
+Полнотекстовый поиск по курсам и урокам.
+
+PostgreSQL: таблица lms_search_document с колонкой tsvector и GIN-индексом.
+SQLite: виртуальная таблица FTS5 lms_search_fts.
+Обе таблицы создаются миграцией 0008_search_index и обновляются сигналами
+при сохранении и удалении курсов и уроков (см. lms.signals). Строки, записанные
+в обход сигналов (loaddata, update(), bulk_create, данные до миграции 0008),
+переиндексирует команда rebuild_search_index.
+
+Документ идентифицируется doc_id = id * 2 + код типа (0 — курс, 1 — урок),
+что позволяет обновлять и удалять его по первичному ключу / rowid.
+"""
+from django.conf import settings
+from django.db import connection
+
+KIND_CODES = {"course": 0, "lesson": 1}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+
+def make_doc_id(kind, pk):
+    return pk * 2 + KIND_CODES[kind]
+
+
+def split_doc_id(doc_id):
+    return KINDS[doc_id % 2], doc_id // 2
+
+
+def _words(query):
+    return [word for word in query.replace('"', " ").split() if word]
+
+
+class PostgresSearchBackend:
+    table = "lms_search_document"
+
+    @property
+    def config(self):
+        return getattr(settings, "LMS_SEARCH_CONFIG", "russian")
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f"""
+            INSERT INTO {self.table} (doc_id, owner_id, document)
+            VALUES (
+                %s, %s,
+                setweight(to_tsvector(%s::regconfig, %s), 'A')
+                || setweight(to_tsvector(%s::regconfig, %s), 'B')
+            )
+            ON CONFLICT (doc_id) DO UPDATE
+            SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document
+            """,
+            [
+                (doc_id, owner_id, self.config, name, self.config, description)
+                for doc_id, owner_id, name, description in rows
+            ],
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.execute(f"DELETE FROM {self.table} WHERE doc_id = ANY(%s)", [list(doc_ids)])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, cursor, query, owner_id, after, limit):
+        params = [self.config, " ".join(_words(query))]
+        filters = []
+        if owner_id is not None:
+            filters.append("owner_id = %s")
+            params.append(owner_id)
+        outer = ""
+        if after is not None:
+            outer = "WHERE score < %s OR (score = %s AND doc_id > %s)"
+        sql = f"""
+            SELECT doc_id, score FROM (
+                SELECT doc_id, ts_rank(document, q)::float8 AS score
+                FROM {self.table}, plainto_tsquery(%s::regconfig, %s) AS q
+                WHERE document @@ q {''.join(' AND ' + f for f in filters)}
+            ) AS ranked
+            {outer}
+            ORDER BY score DESC, doc_id
+            LIMIT %s
+        """
+        if after is not None:
+            params += [after[0], after[0], after[1]]
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+class SqliteSearchBackend:
+    table = "lms_search_fts"
+
+    def upsert(self, cursor, rows):
+        rows = list(rows)
+        self.delete(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {self.table} (rowid, owner_id, name, description) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+    def delete(self, cursor, doc_ids):
+        cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(doc_id,) for doc_id in doc_ids])
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, cursor, query, owner_id, after, limit):
+        # Каждое слово в кавычках: пользовательский ввод не интерпретируется как синтаксис FTS5
+        match = " ".join(f'"{word}"' for word in _words(query))
+        # Название весит больше описания; bm25 тем меньше, чем лучше совпадение
+        score = f"-bm25({self.table}, 0.0, 10.0, 1.0)"
+        sql = f"SELECT rowid, {score} AS score FROM {self.table} WHERE {self.table} MATCH %s"
+        params = [match]
+        if owner_id is not None:
+            sql += " AND owner_id = %s"
+            params.append(owner_id)
+        if after is not None:
+            sql += f" AND ({score} < %s OR ({score} = %s AND rowid > %s))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY score DESC, rowid LIMIT %s"
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SqliteSearchBackend,
+}
+
+
+def get_backend():
+    backend_class = BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+def index_objects(kind, objects):
+    """Добавление или обновление курсов/уроков в поисковом индексе."""
+    backend = get_backend()
+    rows = [
+        (make_doc_id(kind, obj.pk), obj.owner_id, obj.name, obj.description or "")
+        for obj in objects
+    ]
+    if backend is None or not rows:
+        return
+    with connection.cursor() as cursor:
+        backend.upsert(cursor, rows)
+
+
+def remove_objects(kind, pks):
+    """Удаление курсов/уроков из поискового индекса."""
+    backend = get_backend()
+    doc_ids = [make_doc_id(kind, pk) for pk in pks]
+    if backend is None or not doc_ids:
+        return
+    with connection.cursor() as cursor:
+        backend.delete(cursor, doc_ids)
+
+
+def clear_index():
+    """Удаление всех документов из поискового индекса."""
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+
+
+def search(query, owner_id=None, after=None, limit=20):
+    """
+    Поиск с ранжированием и keyset-пагинацией.
+
+    Возвращает список (kind, id, score), отсортированный по убыванию score.
+    after — (score, doc_id) последнего элемента предыдущей страницы.
+    """
+    backend = get_backend()
+    if backend is None:
+        raise NotImplementedError(f"Полнотекстовый поиск не поддерживается для {connection.vendor}")
+    if not _words(query):
+        return []
+    with connection.cursor() as cursor:
+        rows = backend.search(cursor, query, owner_id, after, limit)
+    return [(*split_doc_id(doc_id), score) for doc_id, score in rows]
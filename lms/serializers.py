@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from rest_framework.fields import SerializerMethodField
+from rest_framework.permissions import SAFE_METHODS
 
-from lms.models import Payment
+from lms.models import CourseRanking, Payment
 from .models import Course, Lesson, CourseSubscription
+from .subscription_cache import get_subscribed_course_ids
 from .validators import validate_video_url_only_youtube
 
 
@@ -14,8 +16,42 @@ class LessonGroupSerializer(serializers.ModelSerializer):
         fields = ["name", "video_url"]
 
 
-class CourseSerializer(serializers.ModelSerializer):
-    lessons_count = SerializerMethodField()
+class SparseFieldsMixin:
+    """
+    Выборочные поля и раскрытие вложенных данных по параметрам запроса.
+
+    ?fields=name,description — отдать только перечисленные поля (для GET);
+    ?expand=lessons_group — добавить поля из expandable_fields, которые по умолчанию не отдаются.
+    """
+    expandable_fields = ()
+
+    @staticmethod
+    def _parse_param(request, param):
+        value = request.query_params.get(param, "") if request is not None else ""
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        fields = set(cls.Meta.fields)
+        expand = cls._parse_param(request, "expand")
+        fields -= set(cls.expandable_fields) - expand
+        if request is not None and request.method in SAFE_METHODS:
+            only = cls._parse_param(request, "fields")
+            if only:
+                fields &= only | expand
+        return fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.get_requested_fields(self.context.get("request"))
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+
+
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = ("lessons_group",)
+
     lessons_group = LessonGroupSerializer(
         source="lessons",
         many=True,
@@ -30,19 +66,21 @@ class CourseSerializer(serializers.ModelSerializer):
             "preview",
             "description",
             "lessons_count",
+            "subscribers_count",
             "lessons_group",
             "owner",
             "is_subscribed",
         )
-
-    def get_lessons_count(self, obj):
-        return obj.lessons.count()
+        read_only_fields = ("lessons_count", "subscribers_count")
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user and user.is_authenticated:
-            return obj.subscriptions.filter(user=user).exists()
-        return False
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+        request = self.context.get('request')
+        if request is None:
+            return False
+        # Множество подписок пользователя одно на запрос (и кэшируется между запросами)
+        return obj.pk in get_subscribed_course_ids(request)
 
 
 class LessonSerializer(serializers.ModelSerializer):
@@ -50,7 +88,29 @@ class LessonSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Lesson
-        fields = "__all__"
+        exclude = ("stripe_product_id", "stripe_price_id", "stripe_price_amount")
+
+
+class PrefetchedCourseField(serializers.PrimaryKeyRelatedField):
+    """Курс берётся из заранее загруженного словаря context["courses"], без запроса на элемент"""
+
+    def to_internal_value(self, data):
+        courses = self.context.get("courses")
+        if courses is None:
+            return super().to_internal_value(data)
+        try:
+            return courses[int(data)]
+        except (KeyError, TypeError, ValueError):
+            self.fail("does_not_exist", pk_value=data)
+
+
+class LessonBulkItemSerializer(LessonSerializer):
+    """Сериализатор элемента массового создания/обновления уроков"""
+    id = serializers.IntegerField(required=False)
+    course = PrefetchedCourseField(queryset=Course.objects.all())
+
+    class Meta(LessonSerializer.Meta):
+        read_only_fields = ["owner"]
 
 
 class CourseSubscriptionSerializer(serializers.ModelSerializer):
@@ -60,6 +120,25 @@ class CourseSubscriptionSerializer(serializers.ModelSerializer):
         read_only_fields = ["user", "created_at"]
 
 
+class CourseSubscriptionBulkSerializer(serializers.Serializer):
+    """Списки курсов для массовой подписки и отписки"""
+    MAX_COURSES = 100
+
+    subscribe = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=MAX_COURSES
+    )
+    unsubscribe = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=MAX_COURSES
+    )
+
+    def validate(self, attrs):
+        if not attrs["subscribe"] and not attrs["unsubscribe"]:
+            raise serializers.ValidationError("Укажите курсы в subscribe или unsubscribe")
+        if set(attrs["subscribe"]) & set(attrs["unsubscribe"]):
+            raise serializers.ValidationError("Курс не может быть одновременно в subscribe и unsubscribe")
+        return attrs
+
+
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -87,3 +166,39 @@ class PaymentStatusSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ['id', 'payment_status', 'payment_date']
         read_only_fields = ['payment_status', 'payment_date']
+
+
+class RevenueReportSerializer(serializers.Serializer):
+    """Параметры отчёта по выручке"""
+    GROUP_BY_FIELDS = {
+        'day': ('day',),
+        'item': ('course', 'lesson'),
+        'day_item': ('day', 'course', 'lesson'),
+    }
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    group_by = serializers.ChoiceField(choices=list(GROUP_BY_FIELDS), default='day')
+
+    def validate(self, attrs):
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from не может быть позже date_to")
+        return attrs
+
+
+class PopularCoursesSerializer(serializers.Serializer):
+    """Параметры рейтинга популярных курсов"""
+    ORDER_FIELDS = {
+        'subscribers': '-subscribers_count',
+        'purchases': '-purchases_count',
+    }
+
+    window = serializers.ChoiceField(choices=CourseRanking.WINDOW_CHOICES, default='30d')
+    by = serializers.ChoiceField(choices=list(ORDER_FIELDS), default='subscribers')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class CourseRankingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CourseRanking
+        fields = ['course', 'course_name', 'subscribers_count', 'purchases_count']
@@ -0,0 +1,173 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import notifications, search
+from .models import Course, CourseSubscription, Lesson, Payment, RevenueSummary
+from .subscription_cache import invalidate_subscribed_courses
+
+
+def touch_courses(course_ids):
+    """Обновление updated_at курсов, чьи уроки изменились (версия курса для ETag)."""
+    course_ids = {course_id for course_id in course_ids if course_id}
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+
+
+def adjust_course_counters(field, deltas):
+    """
+    Атомарное изменение счётчика курса через F().
+
+    deltas — {course_id: изменение}; курсы с одинаковым изменением
+    обновляются одним запросом.
+    """
+    by_delta = defaultdict(list)
+    for course_id, delta in Counter(deltas).items():
+        if course_id and delta:
+            by_delta[delta].append(course_id)
+    for delta, course_ids in by_delta.items():
+        courses = Course.objects.filter(pk__in=course_ids)
+        if delta < 0:
+            # Не уходим в минус при рассинхронизации счётчика
+            courses = courses.filter(**{f"{field}__gte": -delta})
+        courses.update(**{field: F(field) + delta})
+
+
+def revenue_key(payment):
+    """Строка сводки выручки для платежа: день и курс, а для оплаты урока — урок."""
+    day = timezone.localdate(payment.payment_date)
+    if payment.course_id:
+        return day, payment.course_id, None
+    return day, None, payment.lesson_id
+
+
+def adjust_revenue(payments, sign=1):
+    """
+    Добавление (sign=1) или вычитание (sign=-1) оплаченных платежей в сводке выручки.
+
+    Строки меняются через F(), поэтому параллельные оплаты не теряют обновлений.
+    """
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for payment in payments:
+        total = totals[revenue_key(payment)]
+        total[0] += 1
+        total[1] += Decimal(str(payment.payment_price))
+
+    for (day, course_id, lesson_id), (count, amount) in totals.items():
+        rows = RevenueSummary.objects.filter(day=day, course_id=course_id, lesson_id=lesson_id)
+        if sign < 0:
+            rows = rows.filter(payments_count__gte=count)
+        changes = {
+            "payments_count": F("payments_count") + sign * count,
+            "amount": F("amount") + sign * amount,
+        }
+        if rows.update(**changes) or sign < 0:
+            continue
+        try:
+            with transaction.atomic():
+                RevenueSummary.objects.create(
+                    day=day, course_id=course_id, lesson_id=lesson_id, payments_count=count, amount=amount
+                )
+        except IntegrityError:
+            # Строку успела создать параллельная транзакция
+            rows.update(**changes)
+
+
+@receiver(post_init, sender=Lesson)
+def remember_lesson_course(sender, instance, **kwargs):
+    # Читаем из __dict__, чтобы не загружать отложенное поле
+    instance._loaded_course_id = instance.__dict__.get("course_id")
+
+
+@receiver(post_save, sender=Lesson)
+def update_course_on_lesson_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old_course_id = instance._loaded_course_id
+    if created:
+        adjust_course_counters("lessons_count", {instance.course_id: 1})
+    elif old_course_id != instance.course_id:
+        adjust_course_counters("lessons_count", {old_course_id: -1, instance.course_id: 1})
+    touch_courses([instance.course_id, old_course_id])
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Lesson)
+def update_course_on_lesson_delete(sender, instance, **kwargs):
+    adjust_course_counters("lessons_count", {instance.course_id: -1})
+    touch_courses([instance.course_id])
+
+
+@receiver(post_save, sender=CourseSubscription)
+def update_course_on_subscribe(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        adjust_course_counters("subscribers_count", {instance.course_id: 1})
+        invalidate_subscribed_courses([instance.user_id])
+
+
+@receiver(post_delete, sender=CourseSubscription)
+def update_course_on_unsubscribe(sender, instance, **kwargs):
+    adjust_course_counters("subscribers_count", {instance.course_id: -1})
+    invalidate_subscribed_courses([instance.user_id])
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_objects("course", [instance])
+
+
+@receiver(post_save, sender=Lesson)
+def index_lesson(sender, instance, raw, **kwargs):
+    if not raw:
+        search.index_objects("lesson", [instance])
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    search.remove_objects("course", [instance.pk])
+
+
+@receiver(post_delete, sender=Lesson)
+def unindex_lesson(sender, instance, **kwargs):
+    search.remove_objects("lesson", [instance.pk])
+
+
+@receiver(post_init, sender=Payment)
+def remember_payment_status(sender, instance, **kwargs):
+    instance._loaded_payment_status = instance.__dict__.get("payment_status")
+
+
+@receiver(post_save, sender=Payment)
+def update_revenue_on_payment_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    was_paid = not created and instance._loaded_payment_status == "paid"
+    is_paid = instance.payment_status == "paid"
+    if is_paid != was_paid:
+        adjust_revenue([instance], 1 if is_paid else -1)
+    instance._loaded_payment_status = instance.payment_status
+
+
+@receiver(post_delete, sender=Payment)
+def update_revenue_on_payment_delete(sender, instance, **kwargs):
+    if instance.payment_status == "paid":
+        adjust_revenue([instance], -1)
+
+
+@receiver(post_save, sender=Course)
+def notify_on_course_save(sender, instance, created, raw, **kwargs):
+    # У нового курса ещё нет подписчиков
+    if not created and not raw:
+        notifications.schedule_course_notifications([instance.pk])
+
+
+@receiver(post_save, sender=Lesson)
+def notify_on_lesson_save(sender, instance, raw, **kwargs):
+    if not raw:
+        notifications.schedule_course_notifications([instance.course_id])
@@ -1,100 +1,264 @@
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
 import stripe
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
-from typing import Optional, Tuple
+from requests.adapters import HTTPAdapter
+
+from lms.fake_stripe import FakeStripeClient
+
+logger = logging.getLogger(__name__)
+
+# Статус платежа по событию вебхука checkout.session.*
+WEBHOOK_EVENT_STATUSES = {
+    'checkout.session.async_payment_succeeded': 'paid',
+    'checkout.session.async_payment_failed': 'failed',
+    'checkout.session.expired': 'canceled',
+}
+
+# Статусы, которые Stripe уже не изменит
+PAYMENT_TERMINAL_STATUSES = ('paid', 'failed', 'canceled')
+
+_client = None
+_fake_client = None
+_client_lock = threading.Lock()
+# Блокировки для single-flight запросов статуса: одна на группу session id
+_status_locks = [threading.Lock() for _ in range(64)]
+
+
+def build_stripe_client(api_base: Optional[str] = None) -> stripe.StripeClient:
+    """
+    Клиент Stripe с общим пулом keep-alive соединений, таймаутами и повторами.
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+    Повторы выполняет сама библиотека stripe: экспоненциальная задержка с jitter,
+    не более STRIPE_MAX_NETWORK_RETRIES попыток, только для безопасных к повтору ошибок.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=getattr(settings, 'STRIPE_HTTP_POOL_SIZE', 10))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    http_client = stripe.RequestsClient(
+        timeout=(
+            getattr(settings, 'STRIPE_CONNECT_TIMEOUT', 3),
+            getattr(settings, 'STRIPE_READ_TIMEOUT', 10),
+        ),
+        session=session,
+    )
+    api_base = api_base or getattr(settings, 'STRIPE_API_BASE', None)
+    return stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY,
+        http_client=http_client,
+        max_network_retries=getattr(settings, 'STRIPE_MAX_NETWORK_RETRIES', 2),
+        base_addresses={'api': api_base} if api_base else None,
+    )
+
+
+def get_fake_stripe_client() -> FakeStripeClient:
+    """Общий in-memory клиент для STRIPE_BACKEND = "fake"."""
+    global _fake_client
+    latency_ms = getattr(settings, 'STRIPE_FAKE_LATENCY_MS', 0)
+    error_rate = getattr(settings, 'STRIPE_FAKE_ERROR_RATE', 0.0)
+    with _client_lock:
+        if _fake_client is None:
+            _fake_client = FakeStripeClient(latency_ms=latency_ms, error_rate=error_rate)
+        else:
+            # Настройки могут меняться на лету (override_settings в бенчмарке и тестах)
+            _fake_client.latency, _fake_client.error_rate = latency_ms / 1000, error_rate
+    return _fake_client
+
+
+def get_stripe_client():
+    """Общий для всех потоков процесса клиент Stripe (или фейковый, по STRIPE_BACKEND)."""
+    global _client
+    if getattr(settings, 'STRIPE_BACKEND', 'stripe') == 'fake':
+        return get_fake_stripe_client()
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = build_stripe_client()
+    return _client
 
 
 class StripeService:
+    def __init__(self, client: Optional[stripe.StripeClient] = None):
+        self._client = client
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        if self._client is None:
+            self._client = get_stripe_client()
+        return self._client
+
     @staticmethod
-    def create_product(name: str, description: Optional[str] = None) -> stripe.Product:
+    def _call(operation: str, func, *args, **kwargs):
+        """Вызов API Stripe с логированием длительности."""
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            logger.info("Stripe %s: %.1f ms", operation, (time.perf_counter() - started) * 1000)
+
+    def create_product(self, name: str, description: Optional[str] = None) -> stripe.Product:
         """Создание продукта в Stripe."""
         try:
-            product = stripe.Product.create(
-                name=name,
-                description=description or name
+            return self._call(
+                'products.create',
+                self.client.v1.products.create,
+                params={'name': name, 'description': description or name},
             )
-            return product
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             raise ValueError(f"Ошибка при создании продукта в Stripe: {str(e)}")
 
-    @staticmethod
-    def create_price(product_id: str, price: int, currency: str = 'rub') -> stripe.Price:
+    def create_price(self, product_id: str, price: int, currency: str = 'rub') -> stripe.Price:
         """Создание цены для продукта в Stripe."""
         try:
-            price_object = stripe.Price.create(
-                product=product_id,
-                unit_amount=price * 100,
-                currency=currency
+            return self._call(
+                'prices.create',
+                self.client.v1.prices.create,
+                params={'product': product_id, 'unit_amount': price * 100, 'currency': currency},
             )
-            return price_object
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             raise ValueError(f"Ошибка при создании цены в Stripe: {str(e)}")
 
-    @staticmethod
     def create_session(
+            self,
             price_id: str,
             success_url: str,
             cancel_url: str,
-            customer_email: Optional[str] = None
+            customer_email: Optional[str] = None,
+            idempotency_key: Optional[str] = None
     ) -> Tuple[str, str]:
         """Создание платежной сессии в Stripe."""
+        options = {'idempotency_key': idempotency_key} if idempotency_key else None
         try:
-            session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price': price_id,
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url=success_url,
-                cancel_url=cancel_url,
-                customer_email=customer_email
+            session = self._call(
+                'checkout.sessions.create',
+                self.client.v1.checkout.sessions.create,
+                params={
+                    'payment_method_types': ['card'],
+                    'line_items': [{
+                        'price': price_id,
+                        'quantity': 1,
+                    }],
+                    'mode': 'payment',
+                    'success_url': success_url,
+                    'cancel_url': cancel_url,
+                    'customer_email': customer_email,
+                },
+                options=options,
             )
             return session.id, session.url
-        except stripe.error.StripeError as e:
+        except stripe.StripeError as e:
             raise ValueError(f"Ошибка при создании сессии в Stripe: {str(e)}")
 
     @staticmethod
-    def get_payment_status(session_id: str) -> str:
+    def get_session_status(session) -> str:
+        """Статус платежа по checkout-сессии Stripe."""
+        payment_status = session.payment_status
+        if payment_status == 'paid':
+            return 'paid'
+        elif session.get('status') == 'expired':
+            return 'canceled'
+        elif payment_status == 'unpaid':
+            return 'pending'
+        else:
+            return 'failed'
+
+    def get_payment_status(self, session_id: str) -> str:
         """Проверка статуса платежа."""
         try:
-            session = stripe.checkout.Session.retrieve(session_id)
-            payment_status = session.payment_status
-            if payment_status == 'paid':
-                return 'paid'
-            elif payment_status == 'unpaid':
-                return 'pending'
-            else:
-                return 'failed'
-        except stripe.error.StripeError as e:
+            session = self._call(
+                'checkout.sessions.retrieve', self.client.v1.checkout.sessions.retrieve, session_id
+            )
+            return self.get_session_status(session)
+        except stripe.StripeError as e:
             raise ValueError(f"Ошибка при получении статуса платежа: {str(e)}")
 
-    @classmethod
-    def create_payment_for_course(cls, course, user) -> Tuple[str, str]:
-        """Создание платежа за курс."""
-        # Создаем продукт, если его еще нет
-        if not course.stripe_product_id:
-            product = cls.create_product(
-                name=course.name,
-                description=f"Курс: {course.name}"
+    def get_cached_payment_status(self, session_id: str) -> str:
+        """
+        Статус платежа с кэшем на STRIPE_STATUS_CACHE_TIMEOUT секунд.
+
+        Одновременные запросы одного session id в процессе ждут один вызов Stripe.
+        """
+        timeout = getattr(settings, 'STRIPE_STATUS_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return self.get_payment_status(session_id)
+
+        key = f"lms:stripe_status:{session_id}"
+        value = cache.get(key)
+        if value is None:
+            with _status_locks[hash(session_id) % len(_status_locks)]:
+                value = cache.get(key)
+                if value is None:
+                    value = self.get_payment_status(session_id)
+                    cache.set(key, value, timeout)
+        return value
+
+    def list_sessions(self, created_gte: int, limit: int = 100, starting_after: Optional[str] = None):
+        """Страница checkout-сессий, созданных не раньше created_gte (unix time)."""
+        params = {'created': {'gte': created_gte}, 'limit': limit}
+        if starting_after:
+            params['starting_after'] = starting_after
+        try:
+            return self._call('checkout.sessions.list', self.client.v1.checkout.sessions.list, params=params)
+        except stripe.StripeError as e:
+            raise ValueError(f"Ошибка при получении списка сессий Stripe: {str(e)}")
+
+    @staticmethod
+    def construct_event(payload: bytes, signature: str) -> stripe.Event:
+        """Проверка подписи вебхука и разбор события."""
+        try:
+            return stripe.Webhook.construct_event(
+                payload.decode('utf-8'), signature, settings.STRIPE_WEBHOOK_SECRET
             )
-            course.stripe_product_id = product.id
-            course.save()
+        except (ValueError, stripe.SignatureVerificationError) as e:
+            raise ValueError(f"Неверное событие Stripe: {str(e)}")
 
-        # Создаем цену для продукта
-        price = cls.create_price(
-            product_id=course.stripe_product_id,
-            price=int(course.price)  # Предполагается, что у курса есть поле price
-        )
+    @staticmethod
+    def get_event_status(event_type: str, session) -> Optional[str]:
+        """Статус платежа по событию checkout.session.* (None — статус не меняется)."""
+        if event_type == 'checkout.session.completed':
+            # При отложенных способах оплаты деньги приходят позже (async_payment_succeeded)
+            return 'paid' if session.get('payment_status') == 'paid' else None
+        return WEBHOOK_EVENT_STATUSES.get(event_type)
+
+    def get_or_create_price(self, item, description: Optional[str] = None) -> str:
+        """
+        ID цены Stripe для курса или урока.
+
+        Продукт создаётся один раз на объект, новая цена — только при изменении price.
+        ID сохраняются через update(), чтобы не трогать updated_at и сигналы модели.
+        """
+        changed = {}
+        if not item.stripe_product_id:
+            product = self.create_product(name=item.name, description=description)
+            changed["stripe_product_id"] = item.stripe_product_id = product.id
+
+        if not item.stripe_price_id or item.stripe_price_amount != item.price:
+            price = self.create_price(product_id=item.stripe_product_id, price=int(item.price))
+            changed["stripe_price_id"] = item.stripe_price_id = price.id
+            changed["stripe_price_amount"] = item.stripe_price_amount = item.price
+
+        if changed:
+            type(item).objects.filter(pk=item.pk).update(**changed)
+        return item.stripe_price_id
+
+    def create_payment_for_course(self, course, user) -> Tuple[str, str]:
+        """Создание платежа за курс."""
+        price_id = self.get_or_create_price(course, description=f"Курс: {course.name}")
 
         # Создаем сессию оплаты
         success_url = settings.SITE_URL + reverse('payment_success')
         cancel_url = settings.SITE_URL + reverse('payment_cancel')
 
-        session_id, session_url = cls.create_session(
-            price_id=price.id,
+        session_id, session_url = self.create_session(
+            price_id=price_id,
             success_url=success_url,
             cancel_url=cancel_url,
             customer_email=user.email
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import CourseSubscription
+
+
+def _cache_key(user_id):
+    return f"lms:subscribed_courses:{user_id}"
+
+
+def subscriptions_cache_enabled() -> bool:
+    """
+    Включён ли кэш подписок между запросами.
+
+    Без него is_subscribed дешевле считать подзапросом EXISTS в выборке страницы,
+    чем загружать все подписки пользователя на каждый запрос.
+    """
+    return bool(getattr(settings, "LMS_SUBSCRIPTIONS_CACHE_TIMEOUT", 0))
+
+
+def get_subscribed_course_ids(request) -> frozenset:
+    """
+    Множество id курсов, на которые подписан пользователь запроса.
+
+    Множество запоминается на объекте запроса, а при LMS_SUBSCRIPTIONS_CACHE_TIMEOUT
+    хранится и в кэше между запросами, так что is_subscribed для страницы курсов
+    проверяется в памяти. Кэш сбрасывается при подписке и отписке.
+    """
+    cached = getattr(request, "_subscribed_course_ids", None)
+    if cached is not None:
+        return cached
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    timeout = getattr(settings, "LMS_SUBSCRIPTIONS_CACHE_TIMEOUT", 0)
+    value = cache.get(_cache_key(user.pk)) if timeout else None
+    if value is None:
+        value = frozenset(CourseSubscription.objects.filter(user=user).values_list("course_id", flat=True))
+        if timeout:
+            cache.set(_cache_key(user.pk), value, timeout)
+
+    request._subscribed_course_ids = value
+    return value
+
+
+def invalidate_subscribed_courses(user_ids):
+    """
+    Сброс кэша подписок пользователей.
+
+    Ключи удаляются сразу и ещё раз после фиксации транзакции: параллельный запрос
+    мог успеть положить в кэш состояние до коммита.
+    """
+    keys = [_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,107 @@
+"""
+Подписка и отписка одним SQL-запросом.
+
+Подписка — INSERT ... SELECT из таблицы курсов с ON CONFLICT DO NOTHING:
+несуществующий курс и повторная подписка дают ноль строк без отдельной
+проверки существования и без IntegrityError при гонке. Отписка — DELETE
+с числом удалённых строк. Оба запроса обходят сигналы модели, поэтому
+subscribers_count и кэш подписок пользователя обновляются здесь же.
+"""
+from typing import Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Course, CourseSubscription
+from .signals import adjust_course_counters
+from .subscription_cache import invalidate_subscribed_courses
+
+SUBSCRIPTION_TABLE = CourseSubscription._meta.db_table
+COURSE_TABLE = Course._meta.db_table
+
+
+def subscribe(user_id, course_id) -> Optional[CourseSubscription]:
+    """Подписка на курс; None, если курса нет или подписка уже есть."""
+    created_at = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SUBSCRIPTION_TABLE} (user_id, course_id, created_at) "
+            f"SELECT %s, id, %s FROM {COURSE_TABLE} WHERE id = %s "
+            "ON CONFLICT (user_id, course_id) DO NOTHING RETURNING id",
+            [user_id, created_at, course_id],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        adjust_course_counters("subscribers_count", {course_id: 1})
+    invalidate_subscribed_courses([user_id])
+    return CourseSubscription(id=row[0], user_id=user_id, course_id=course_id, created_at=created_at)
+
+
+def unsubscribe(user_id, course_id) -> bool:
+    """Отписка от курса; False, если подписки не было."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SUBSCRIPTION_TABLE} WHERE user_id = %s AND course_id = %s",
+            [user_id, course_id],
+        )
+        deleted = cursor.rowcount
+        if deleted:
+            adjust_course_counters("subscribers_count", {course_id: -deleted})
+            invalidate_subscribed_courses([user_id])
+    return bool(deleted)
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def subscribe_many(user_id, course_ids) -> set:
+    """Подписка на несколько курсов одним INSERT; возвращает id курсов с новой подпиской."""
+    course_ids = list(set(course_ids))
+    if not course_ids:
+        return set()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SUBSCRIPTION_TABLE} (user_id, course_id, created_at) "
+            f"SELECT %s, id, %s FROM {COURSE_TABLE} WHERE id IN ({_placeholders(course_ids)}) "
+            "ON CONFLICT (user_id, course_id) DO NOTHING RETURNING course_id",
+            [user_id, timezone.now(), *course_ids],
+        )
+        added = {row[0] for row in cursor.fetchall()}
+        adjust_course_counters("subscribers_count", dict.fromkeys(added, 1))
+    if added:
+        invalidate_subscribed_courses([user_id])
+    return added
+
+
+def unsubscribe_many(user_id, course_ids) -> set:
+    """Отписка от нескольких курсов одним DELETE; возвращает id курсов, где подписка была."""
+    course_ids = list(set(course_ids))
+    if not course_ids:
+        return set()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SUBSCRIPTION_TABLE} "
+            f"WHERE user_id = %s AND course_id IN ({_placeholders(course_ids)}) RETURNING course_id",
+            [user_id, *course_ids],
+        )
+        removed = {row[0] for row in cursor.fetchall()}
+        adjust_course_counters("subscribers_count", dict.fromkeys(removed, -1))
+    if removed:
+        invalidate_subscribed_courses([user_id])
+    return removed
+
+
+def toggle(user_id, course_id) -> Optional[bool]:
+    """
+    Переключение подписки: True — подписка есть, False — удалена, None — курса нет.
+
+    При одновременных переключениях вставка, проигравшая гонку, оставляет
+    подписку на месте, поэтому результат тоже True.
+    """
+    if unsubscribe(user_id, course_id):
+        return False
+    if subscribe(user_id, course_id) is not None:
+        return True
+    return True if Course.objects.filter(pk=course_id).exists() else None
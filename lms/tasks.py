@@ -0,0 +1,132 @@
+"""
+Фоновые задачи: платежи и уведомления подписчиков.
+
+Задачи выполняются в пуле потоков процесса. При LMS_TASKS_EAGER = True
+(например, в тестах) задача выполняется сразу в текущем потоке.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from lms.models import Payment
+from lms.stripe_services import StripeService
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_periodic = set()
+_periodic_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "LMS_TASK_WORKERS", 4),
+            thread_name_prefix="lms-tasks",
+        )
+    return _executor
+
+
+def _run_in_thread(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Ошибка фоновой задачи %s", func.__name__)
+    finally:
+        # Поток пула держит своё соединение с БД — закрываем его после задачи
+        close_old_connections()
+
+
+def enqueue(func, *args):
+    """Запуск задачи после фиксации текущей транзакции."""
+    def submit():
+        if getattr(settings, "LMS_TASKS_EAGER", False):
+            func(*args)
+        else:
+            get_executor().submit(_run_in_thread, func, *args)
+
+    transaction.on_commit(submit)
+
+
+def _run_periodically(interval, func):
+    while True:
+        time.sleep(interval)
+        get_executor().submit(_run_in_thread, func)
+
+
+def run_periodically(interval, func):
+    """
+    Запуск задачи в пуле каждые interval секунд после фиксации текущей транзакции.
+
+    На функцию в процессе заводится один поток-планировщик, повторные вызовы его
+    не дублируют. Задача сама находит работу в БД, поэтому после перезапуска процесса
+    ничего не теряется: планировщик стартует при следующем вызове.
+    """
+    def submit():
+        if getattr(settings, "LMS_TASKS_EAGER", False):
+            func()
+            return
+        with _periodic_lock:
+            if func in _periodic:
+                return
+            _periodic.add(func)
+        threading.Thread(
+            target=_run_periodically, args=(interval, func), name=f"lms-periodic-{func.__name__}", daemon=True
+        ).start()
+
+    transaction.on_commit(submit)
+
+
+def start_checkout_session(payment, success_url, cancel_url, idempotency_key=None):
+    """
+    Создание сессии Stripe для уже созданного платежа — в запросе или в фоновой задаче.
+
+    Возвращает payment_url; ссылки Stripe сохраняются в платёж. При ошибке платёж
+    переводится в failed, а исключение пробрасывается дальше.
+    """
+    item = payment.course or payment.lesson
+    description = f"Курс: {item.name}" if payment.course else f"Урок: {item.name}"
+    stripe_service = StripeService()
+
+    try:
+        price_id = stripe_service.get_or_create_price(item, description=description)
+        session_id, payment_url = stripe_service.create_session(
+            price_id=price_id,
+            success_url=success_url,
+            cancel_url=cancel_url,
+            customer_email=payment.user.email,
+            idempotency_key=idempotency_key,
+        )
+    except Exception:
+        logger.exception("Не удалось создать сессию Stripe для платежа %s", payment.pk)
+        # Неудачный платёж не переиспользуется, а ключ освобождается,
+        # чтобы клиент мог повторить запрос с тем же Idempotency-Key
+        Payment.objects.filter(pk=payment.pk).update(payment_status="failed", idempotency_key=None)
+        payment.payment_status, payment.idempotency_key = "failed", None
+        raise
+
+    fields = {
+        "stripe_product_id": item.stripe_product_id,
+        "stripe_price_id": price_id,
+        "stripe_payment_id": session_id,
+        "stripe_payment_url": payment_url,
+    }
+    Payment.objects.filter(pk=payment.pk).update(**fields)
+    for field, value in fields.items():
+        setattr(payment, field, value)
+    return payment_url
+
+
+def create_checkout_session(payment_id, success_url, cancel_url, idempotency_key=None):
+    """Фоновая задача: сессия Stripe для платежа, созданного с ответом 202 Accepted."""
+    payment = Payment.objects.select_related("user", "course", "lesson").get(pk=payment_id)
+    try:
+        start_checkout_session(payment, success_url, cancel_url, idempotency_key)
+    except Exception:
+        # Ошибка уже записана в лог, платёж переведён в failed
+        return
@@ -0,0 +1,104 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseSubscription, Lesson
+from users.models import User
+
+
+class ConditionalGetTests(APITestCase):
+    """Тесты ETag / 304 Not Modified для курсов и уроков"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.course = Course.objects.create(name="Course", owner=self.user)
+        self.lesson = Lesson.objects.create(
+            course=self.course,
+            name="Lesson",
+            video_url="https://www.youtube.com/watch?v=abcd",
+            owner=self.user,
+        )
+
+    def _assert_not_modified(self, url, last_modified=False):
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        etag = resp["ETag"]
+        self.assertEqual("Last-Modified" in resp, last_modified)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+        return etag
+
+    def _assert_modified(self, url, etag):
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_course_retrieve_changes_with_lessons(self):
+        """Изменение урока меняет версию курса"""
+        url = reverse("course-detail", args=[self.course.pk])
+        etag = self._assert_not_modified(url)
+
+        self.lesson.name = "Lesson renamed"
+        self.lesson.save()
+        self._assert_modified(url, etag)
+
+    def test_course_list_changes_with_subscription(self):
+        """Подписка меняет ETag списка курсов (is_subscribed)"""
+        url = reverse("course-list")
+        etag = self._assert_not_modified(url)
+
+        CourseSubscription.objects.create(user=self.user, course=self.course)
+        self._assert_modified(url, etag)
+
+    def test_if_modified_since_ignored_for_courses_and_lists(self):
+        """Без Last-Modified If-Modified-Since не даёт 304 после удаления или подписки"""
+        other = Course.objects.create(name="Other", owner=self.user)
+        since = "Thu, 01 Jan 2099 00:00:00 GMT"
+
+        other.delete()
+        resp = self.client.get(reverse("course-list"), HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        CourseSubscription.objects.create(user=self.user, course=self.course)
+        resp = self.client.get(reverse("course-detail", args=[self.course.pk]), HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.data["is_subscribed"])
+
+    def test_lesson_retrieve_and_list(self):
+        """Уроки отдают 304 до изменения и 200 после"""
+        detail_url = reverse("lesson-detail", args=[self.lesson.pk])
+        list_url = reverse("lesson-list")
+        detail_etag = self._assert_not_modified(detail_url, last_modified=True)
+        list_etag = self._assert_not_modified(list_url)
+
+        Lesson.objects.create(
+            course=self.course,
+            name="Second",
+            video_url="https://www.youtube.com/watch?v=efgh",
+            owner=self.user,
+        )
+        self._assert_modified(list_url, list_etag)
+        self._assert_not_modified(detail_url, last_modified=True)
+
+        self.lesson.delete()
+        resp = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lesson_move_updates_both_courses(self):
+        """Перенос урока в другой курс обновляет версии обоих курсов"""
+        other = Course.objects.create(name="Other", owner=self.user)
+        old_versions = {
+            course.pk: course.updated_at for course in Course.objects.all()
+        }
+
+        lesson = Lesson.objects.get(pk=self.lesson.pk)
+        lesson.course = other
+        lesson.save()
+
+        for course in Course.objects.all():
+            self.assertGreater(course.updated_at, old_versions[course.pk])
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from lms.models import Course, CourseSubscription, Lesson
+from users.models import User
+
+VIDEO = "https://www.youtube.com/watch?v=abcd"
+
+
+class CourseCountersTests(TestCase):
+    """Тесты счётчиков lessons_count и subscribers_count"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.course = Course.objects.create(name="Course", owner=self.user)
+        self.other_course = Course.objects.create(name="Other", owner=self.user)
+
+    def _counters(self, course):
+        course.refresh_from_db()
+        return course.lessons_count, course.subscribers_count
+
+    def test_lesson_create_move_delete(self):
+        """Создание, перенос и удаление урока меняют lessons_count"""
+        lesson = Lesson.objects.create(course=self.course, name="L", video_url=VIDEO, owner=self.user)
+        Lesson.objects.create(course=self.course, name="L2", video_url=VIDEO, owner=self.user)
+        self.assertEqual(self._counters(self.course), (2, 0))
+
+        lesson.course = self.other_course
+        lesson.save()
+        self.assertEqual(self._counters(self.course), (1, 0))
+        self.assertEqual(self._counters(self.other_course), (1, 0))
+
+        lesson.delete()
+        self.assertEqual(self._counters(self.other_course), (0, 0))
+
+    def test_subscriptions(self):
+        """Подписка и отписка меняют subscribers_count"""
+        subscription = CourseSubscription.objects.create(user=self.user, course=self.course)
+        self.assertEqual(self._counters(self.course), (0, 1))
+
+        subscription.delete()
+        self.assertEqual(self._counters(self.course), (0, 0))
+
+    def test_course_save_does_not_overwrite_counters(self):
+        """Сохранение устаревшего экземпляра курса не затирает счётчики"""
+        stale = Course.objects.get(pk=self.course.pk)
+        CourseSubscription.objects.create(user=self.user, course=self.course)
+
+        stale.name = "Renamed"
+        stale.save()
+        self.assertEqual(self._counters(self.course), (0, 1))
+
+    def test_recalculate_command_fixes_drift(self):
+        """Команда пересчёта исправляет рассинхронизацию"""
+        Lesson.objects.create(course=self.course, name="L", video_url=VIDEO, owner=self.user)
+        CourseSubscription.objects.create(user=self.user, course=self.course)
+        Course.objects.update(lessons_count=42, subscribers_count=7)
+
+        call_command("recalculate_course_counters", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self._counters(self.course), (1, 1))
+        self.assertEqual(self._counters(self.other_course), (0, 0))
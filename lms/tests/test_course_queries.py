@@ -0,0 +1,87 @@
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseSubscription, Lesson
+from users.models import User
+
+
+class CourseListQueriesTests(APITestCase):
+    """Тесты количества SQL-запросов при получении списка курсов"""
+
+    def setUp(self):
+        self.moderator = User.objects.create_user(
+            username="moder", email="moder@example.com", password="pass1234"
+        )
+        group, _ = Group.objects.get_or_create(name="Moderators")
+        self.moderator.groups.add(group)
+        self.client.force_authenticate(self.moderator)
+
+    def _create_courses(self, count):
+        for i in range(count):
+            course = Course.objects.create(name=f"Course {i}", owner=self.moderator)
+            for j in range(3):
+                Lesson.objects.create(
+                    course=course,
+                    name=f"Lesson {i}.{j}",
+                    video_url="https://www.youtube.com/watch?v=abcd",
+                    owner=self.moderator,
+                )
+            if i % 2 == 0:
+                CourseSubscription.objects.create(user=self.moderator, course=course)
+
+    def _count_list_queries(self, **params):
+        params = {"page_size": 50, "expand": "lessons_group", **params}
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("course-list"), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        """Количество запросов не растёт вместе с числом курсов на странице"""
+        self._create_courses(2)
+        small, _ = self._count_list_queries()
+
+        self._create_courses(10)
+        large, _ = self._count_list_queries()
+
+        self.assertEqual(small, large)
+
+    def test_list_returns_annotated_values(self):
+        """Аннотированные значения совпадают с реальными данными"""
+        self._create_courses(3)
+        _, resp = self._count_list_queries()
+
+        for item in resp.data["results"]:
+            course = Course.objects.get(name=item["name"])
+            self.assertEqual(item["lessons_count"], 3)
+            self.assertEqual(len(item["lessons_group"]), 3)
+            self.assertEqual(
+                item["is_subscribed"],
+                CourseSubscription.objects.filter(user=self.moderator, course=course).exists(),
+            )
+
+    def test_lessons_group_is_opt_in(self):
+        """Список уроков отдаётся только при ?expand=lessons_group и без prefetch в остальных случаях"""
+        self._create_courses(2)
+        expanded, resp = self._count_list_queries()
+        self.assertIn("lessons_group", resp.data["results"][0])
+
+        plain, resp = self._count_list_queries(expand="")
+        self.assertNotIn("lessons_group", resp.data["results"][0])
+        self.assertEqual(plain, expanded - 1)
+
+    def test_sparse_fields_drop_annotations(self):
+        """?fields= ограничивает ответ и убирает ненужные подзапросы"""
+        self._create_courses(2)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("course-list"), {"fields": "name,description"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(resp.data["results"][0]), {"name", "description"})
+
+        page_query = ctx.captured_queries[-1]["sql"].upper()
+        self.assertNotIn("COUNT(", page_query)
+        self.assertNotIn("EXISTS", page_query)
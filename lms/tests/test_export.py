@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from lms.views import CourseViewSet
+from users.models import User
+
+VIDEO = "https://www.youtube.com/watch?v=abcd"
+
+
+class CatalogExportTests(APITestCase):
+    """Тесты потоковой выгрузки каталога"""
+
+    def setUp(self):
+        self.moderator = User.objects.create_user(
+            username="moder", email="moder@example.com", password="pass1234"
+        )
+        group, _ = Group.objects.get_or_create(name="Moderators")
+        self.moderator.groups.add(group)
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        for i in range(5):
+            course = Course.objects.create(name=f"Course {i}", owner=self.owner)
+            for j in range(i % 3):
+                Lesson.objects.create(course=course, name=f"Lesson {i}.{j}", video_url=VIDEO, owner=self.owner)
+        self.url = reverse("course-export")
+
+    def _export(self, **params):
+        self.client.force_authenticate(self.moderator)
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        """Каждая строка — курс со своими уроками"""
+        lines = self._export().splitlines()
+        self.assertEqual(len(lines), 5)
+        courses = [json.loads(line) for line in lines]
+        self.assertEqual([len(course["lessons"]) for course in courses], [0, 1, 2, 0, 1])
+
+    def test_csv_export(self):
+        """Строка на урок, курсы без уроков — одна строка"""
+        rows = list(csv.DictReader(io.StringIO(self._export(export_format="csv"))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]["course_name"], "Course 0")
+        self.assertEqual(rows[0]["lesson_id"], "")
+
+    def test_export_chunks_prefetch(self):
+        """Уроки подгружаются одним запросом на пачку курсов"""
+        # Проверка роли, выборка курсов и по запросу уроков на каждую из трёх пачек
+        with patch.object(CourseViewSet, "export_chunk_size", 2), self.assertNumQueries(5):
+            self._export()
+
+    def test_export_forbidden_for_non_moderator(self):
+        self.client.force_authenticate(self.owner)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
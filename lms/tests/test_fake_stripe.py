@@ -0,0 +1,59 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Payment
+from lms.stripe_services import get_fake_stripe_client
+from users.models import User
+
+
+@override_settings(STRIPE_BACKEND="fake", STRIPE_STATUS_CACHE_TIMEOUT=0, PAYMENT_REUSE_WINDOW=0)
+class FakeStripeBackendTests(APITestCase):
+    """Тесты платёжного сценария на in-memory Stripe"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.course = Course.objects.create(name="Course", price=1000, owner=self.user)
+        self.client.force_authenticate(self.user)
+
+    def _create_payment(self, **headers):
+        return self.client.post(reverse("payment-create-payment"), {"course": self.course.pk}, **headers)
+
+    def test_payment_flow(self):
+        """Создание платежа, оплата в Stripe и проверка статуса без обращения к сети"""
+        resp = self._create_payment()
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        payment = Payment.objects.get(pk=resp.data["id"])
+        self.assertTrue(payment.stripe_payment_url.endswith(payment.stripe_payment_id))
+
+        status_url = reverse("payment-check-status", args=[payment.pk])
+        self.assertEqual(self.client.get(status_url).data["payment_status"], "pending")
+
+        get_fake_stripe_client().complete_session(payment.stripe_payment_id)
+        self.assertEqual(self.client.get(status_url).data["payment_status"], "paid")
+
+    def test_reconcile_with_fake_sessions(self):
+        payment_ids = []
+        for _ in range(3):
+            payment_ids.append(self._create_payment().data["id"])
+        sessions = list(Payment.objects.filter(pk__in=payment_ids).values_list("stripe_payment_id", flat=True))
+        get_fake_stripe_client().complete_session(sessions[0])
+        get_fake_stripe_client().complete_session(sessions[1], paid=False)
+
+        call_command("reconcile_payments", "--batch-size", "1", stdout=io.StringIO())
+
+        statuses = dict(Payment.objects.filter(pk__in=payment_ids).values_list("stripe_payment_id", "payment_status"))
+        self.assertEqual([statuses[session_id] for session_id in sessions], ["paid", "canceled", "pending"])
+
+    @override_settings(STRIPE_FAKE_ERROR_RATE=1.0)
+    def test_simulated_errors(self):
+        with self.assertLogs("lms.tasks", level="ERROR"):
+            resp = self._create_payment()
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Payment.objects.get().payment_status, "failed")
@@ -0,0 +1,88 @@
+from django.contrib.auth.models import Group
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from users.models import User
+
+VIDEO = "https://www.youtube.com/watch?v=abcd"
+
+
+class LessonBulkTests(APITestCase):
+    """Тесты массового создания и обновления уроков"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="pass1234"
+        )
+        self.course = Course.objects.create(name="Course", owner=self.owner)
+        self.lesson = Lesson.objects.create(
+            course=self.course, name="Existing", video_url=VIDEO, owner=self.owner
+        )
+        self.url = reverse("lesson-bulk")
+
+    def test_bulk_create_and_update(self):
+        """Создание и обновление уроков одним запросом"""
+        self.client.force_authenticate(self.owner)
+        payload = [
+            {"course": self.course.id, "name": f"New {i}", "video_url": VIDEO}
+            for i in range(20)
+        ]
+        payload.append({"id": self.lesson.id, "name": "Existing updated"})
+
+        # Уведомление о курсе уже ожидает рассылки: выборка и увеличение changes_count
+        with self.assertNumQueries(13):
+            resp = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data), 21)
+        self.assertEqual(Lesson.objects.filter(owner=self.owner).count(), 21)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.name, "Existing updated")
+
+    def test_bulk_returns_per_item_errors_and_saves_nothing(self):
+        """При ошибке в элементе ничего не сохраняется, ошибки возвращаются по элементам"""
+        self.client.force_authenticate(self.owner)
+        payload = [
+            {"course": self.course.id, "name": "Good", "video_url": VIDEO},
+            {"course": self.course.id, "name": "Bad", "video_url": "https://vimeo.com/1"},
+            {"course": 999999, "name": "No course", "video_url": VIDEO},
+        ]
+        resp = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.data[0], {})
+        self.assertIn("video_url", resp.data[1])
+        self.assertIn("course", resp.data[2])
+        self.assertEqual(Lesson.objects.count(), 1)
+
+    def test_bulk_update_foreign_lesson_forbidden(self):
+        """Нельзя обновить чужой урок"""
+        self.client.force_authenticate(self.other)
+        resp = self.client.post(self.url, [{"id": self.lesson.id, "name": "Hack"}], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", resp.data[0])
+
+    def test_bulk_create_by_moderator_forbidden(self):
+        """Модератор может обновлять, но не создавать уроки"""
+        group, _ = Group.objects.get_or_create(name="Moderators")
+        self.other.groups.add(group)
+        self.client.force_authenticate(self.other)
+
+        resp = self.client.post(
+            self.url, [{"course": self.course.id, "name": "Mod", "video_url": VIDEO}], format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        resp = self.client.post(self.url, [{"id": self.lesson.id, "name": "By mod"}], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_bulk_requires_list(self):
+        """Тело запроса должно быть списком"""
+        self.client.force_authenticate(self.owner)
+        resp = self.client.post(self.url, {"name": "x"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,86 @@
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from lms.models import Course, CourseSubscription, CourseUpdateNotification, Lesson
+from lms.notifications import iter_subscriber_emails, send_course_notification
+from users.models import User
+
+VIDEO = "https://www.youtube.com/watch?v=abcd"
+
+
+@override_settings(COURSE_NOTIFICATION_DEBOUNCE=60, COURSE_NOTIFICATION_BATCH_SIZE=2)
+class CourseNotificationTests(TestCase):
+    """Тесты рассылки подписчикам об изменении курса"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.course = Course.objects.create(name="Course", owner=self.owner)
+        self.subscribers = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pass1234")
+            for i in range(5)
+        ]
+        for user in self.subscribers:
+            CourseSubscription.objects.create(user=user, course=self.course)
+
+    def test_edits_coalesced_into_one_notification(self):
+        """Правки курса и уроков в пределах окна — одно письмо каждому подписчику"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.course.description = "Updated"
+            self.course.save()
+            Lesson.objects.create(course=self.course, name="Lesson", video_url=VIDEO, owner=self.owner)
+            self.course.save()
+
+        notification = CourseUpdateNotification.objects.get()
+        self.assertEqual(notification.changes_count, 3)
+        # Рассылка запланирована один раз — при первой правке
+        self.assertEqual(len(callbacks), 1)
+
+        with self.assertNumQueries(7):
+            # Выборка и удаление уведомления, курс, три пачки подписчиков и пустая
+            sent = send_course_notification(self.course.pk)
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(u.email for u in self.subscribers))
+        self.assertIn("Course", mail.outbox[0].subject)
+        self.assertFalse(CourseUpdateNotification.objects.exists())
+        # Повторный запуск ничего не отправляет
+        self.assertEqual(send_course_notification(self.course.pk), 0)
+
+    def test_new_course_does_not_notify(self):
+        Course.objects.create(name="New", owner=self.owner)
+        self.assertFalse(CourseUpdateNotification.objects.exists())
+
+    def test_keyset_chunks(self):
+        chunks = list(iter_subscriber_emails(self.course.pk, 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    @override_settings(LMS_TASKS_EAGER=True, COURSE_NOTIFICATION_DEBOUNCE=0)
+    def test_periodic_task_sends_emails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertEqual(len(mail.outbox), 5)
+
+    @patch("lms.tasks.threading.Thread")
+    def test_one_sweeper_per_process(self, mock_thread):
+        """Правки разных курсов не заводят по потоку на курс"""
+        other = Course.objects.create(name="Other", owner=self.owner)
+        with patch("lms.tasks._periodic", set()), self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+            other.save()
+        self.assertEqual(CourseUpdateNotification.objects.count(), 2)
+        mock_thread.assert_called_once()
+
+    def test_command_sends_only_expired_windows(self):
+        self.course.save()
+        call_command("send_course_notifications", stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        CourseUpdateNotification.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+        call_command("send_course_notifications", stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 5)
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from users.models import User
+
+
+class KeysetPaginationTests(APITestCase):
+    """Тесты режима курсора для CoursePaginator и LessonPaginator"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.course = Course.objects.create(name="Course", owner=self.user)
+        for i in range(35):
+            Lesson.objects.create(
+                course=self.course,
+                name=f"Lesson {i}",
+                video_url="https://www.youtube.com/watch?v=abcd",
+                owner=self.user,
+            )
+
+    def _walk(self, url, params):
+        ids = []
+        resp = self.client.get(url, params)
+        while True:
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", resp.data)
+            ids.extend(item["id"] for item in resp.data["results"])
+            if not resp.data["next"]:
+                return ids
+            resp = self.client.get(resp.data["next"])
+
+    def test_cursor_mode_by_query_param(self):
+        """Курсор проходит все уроки по порядку id без дублей"""
+        ids = self._walk(reverse("lesson-list"), {"pagination": "cursor"})
+        expected = list(Lesson.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_cursor_mode_skips_count_query(self):
+        """В режиме курсора не выполняется COUNT(*)"""
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("lesson-list"), {"pagination": "cursor"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries))
+
+    @override_settings(LMS_PAGINATION_MODE="cursor")
+    def test_cursor_mode_by_setting(self):
+        """Режим курсора можно включить настройкой"""
+        resp = self.client.get(reverse("lesson-list"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", resp.data)
+        self.assertEqual(len(resp.data["results"]), 15)
+
+    def test_page_mode_is_default(self):
+        """По умолчанию используется постраничная пагинация"""
+        resp = self.client.get(reverse("lesson-list"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["count"], 35)
@@ -1,8 +1,13 @@
 from unittest.mock import patch, MagicMock
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from lms.filters import PREFIX_END, PaymentSearchFilter
 from lms.models import Course, Lesson, Payment
 
 User = get_user_model()
@@ -13,6 +18,7 @@ class PaymentTests(APITestCase):
 
     def setUp(self):
         """Подготовка данных для тестов"""
+        cache.clear()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -114,6 +120,39 @@ class PaymentTests(APITestCase):
         payment.refresh_from_db()
         self.assertEqual(payment.payment_status, 'paid')
 
+    @patch('lms.stripe_services.StripeService.get_payment_status')
+    def test_check_status_terminal_skips_stripe(self, mock_get_payment_status):
+        """Завершённый платёж не проверяется в Stripe"""
+        payment = Payment.objects.create(
+            user=self.user,
+            course=self.course,
+            payment_price=self.course.price,
+            payment_status='paid',
+            stripe_payment_id='sess_paid'
+        )
+
+        response = self.client.get(reverse('payment-check-status', args=[payment.id]))
+
+        self.assertEqual(response.data['payment_status'], 'paid')
+        mock_get_payment_status.assert_not_called()
+
+    @override_settings(STRIPE_STATUS_CACHE_TIMEOUT=60)
+    @patch('lms.stripe_services.StripeService.get_payment_status', return_value='pending')
+    def test_check_status_pending_is_cached(self, mock_get_payment_status):
+        """Повторные опросы ожидающего платежа берут статус из кэша"""
+        payment = Payment.objects.create(
+            user=self.user,
+            course=self.course,
+            payment_price=self.course.price,
+            stripe_payment_id='sess_pending'
+        )
+
+        url = reverse('payment-check-status', args=[payment.id])
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).data['payment_status'], 'pending')
+
+        mock_get_payment_status.assert_called_once_with('sess_pending')
+
     # ----------------------------
     # ТЕСТ НЕАВТОРИЗОВАННОГО ДОСТУПА
     # ----------------------------
@@ -122,4 +161,181 @@ class PaymentTests(APITestCase):
         self.client.logout()
         url = reverse('payment-check-status', args=[1])
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # ----------------------------
+    # ТЕСТ ПЕРЕИСПОЛЬЗОВАНИЯ ПРОДУКТА И ЦЕНЫ STRIPE
+    # ----------------------------
+    @override_settings(PAYMENT_REUSE_WINDOW=0)
+    @patch('lms.stripe_services.StripeService.create_product')
+    @patch('lms.stripe_services.StripeService.create_price')
+    @patch('lms.stripe_services.StripeService.create_session')
+    def test_stripe_product_and_price_reused(self, mock_create_session, mock_create_price, mock_create_product):
+        """Продукт создаётся один раз, новая цена — только при изменении цены курса"""
+        mock_create_product.return_value = MagicMock(id='prod_test123')
+        mock_create_price.side_effect = [MagicMock(id='price_1'), MagicMock(id='price_2')]
+        mock_create_session.return_value = ('sess_test123', 'https://stripe.com/test-payment')
+
+        url = reverse('payment-create-payment')
+        for _ in range(3):
+            response = self.client.post(url, {'course': self.course.id})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(mock_create_product.call_count, 1)
+        self.assertEqual(mock_create_price.call_count, 1)
+        self.assertEqual(mock_create_session.call_count, 3)
+
+        self.course.refresh_from_db()
+        self.course.price = 2000
+        self.course.save()
+        self.client.post(url, {'course': self.course.id})
+
+        self.assertEqual(mock_create_product.call_count, 1)
+        self.assertEqual(mock_create_price.call_count, 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.stripe_price_id, 'price_2')
+        self.assertEqual(Payment.objects.latest('id').stripe_price_id, 'price_2')
+
+    # ----------------------------
+    # ТЕСТ АСИНХРОННОГО СОЗДАНИЯ СЕССИИ
+    # ----------------------------
+    @override_settings(LMS_TASKS_EAGER=True)
+    @patch('lms.stripe_services.StripeService.get_or_create_price')
+    @patch('lms.stripe_services.StripeService.create_session')
+    def test_create_payment_async(self, mock_create_session, mock_get_or_create_price):
+        """Платёж создаётся сразу с 202, ссылка на оплату появляется после фоновой задачи"""
+        mock_get_or_create_price.return_value = 'price_test123'
+        mock_create_session.return_value = ('sess_test123', 'https://stripe.com/test-payment')
+
+        url = reverse('payment-create-payment')
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url, {'course': self.course.id}, HTTP_PREFER='respond-async')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNone(response.data['payment_url'])
+        mock_create_session.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+
+        status_response = self.client.get(response['Location'])
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(status_response.data['stripe_payment_url'], 'https://stripe.com/test-payment')
+        self.assertEqual(Payment.objects.get(id=response.data['id']).stripe_payment_id, 'sess_test123')
+
+    @override_settings(LMS_TASKS_EAGER=True)
+    @patch('lms.stripe_services.StripeService.get_or_create_price', side_effect=ValueError('Stripe down'))
+    def test_create_payment_async_failure(self, mock_get_or_create_price):
+        """Ошибка Stripe в фоне переводит платёж в failed"""
+        url = reverse('payment-create-payment')
+        with self.assertLogs('lms.tasks', level='ERROR'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'course': self.course.id}, HTTP_PREFER='respond-async')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(Payment.objects.get(id=response.data['id']).payment_status, 'failed')
+
+    # ----------------------------
+    # ТЕСТЫ ИДЕМПОТЕНТНОСТИ CREATE_PAYMENT
+    # ----------------------------
+    @patch('lms.stripe_services.StripeService.get_or_create_price', return_value='price_test123')
+    @patch('lms.stripe_services.StripeService.create_session')
+    def test_pending_payment_reused(self, mock_create_session, mock_get_or_create_price):
+        """Повторный клик возвращает ожидающий платёж без новой сессии Stripe"""
+        mock_create_session.return_value = ('sess_test123', 'https://stripe.com/test-payment')
+        url = reverse('payment-create-payment')
+
+        first = self.client.post(url, {'course': self.course.id})
+        second = self.client.post(url, {'course': self.course.id})
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(second.data['payment_url'], 'https://stripe.com/test-payment')
+        self.assertEqual(mock_create_session.call_count, 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    @patch('lms.stripe_services.StripeService.get_or_create_price', return_value='price_test123')
+    @patch('lms.stripe_services.StripeService.create_session')
+    def test_pending_payment_without_url_not_reused(self, mock_create_session, mock_get_or_create_price):
+        """Ожидающий платёж без ссылки на оплату не возвращается повторному клику"""
+        mock_create_session.return_value = ('sess_test123', 'https://stripe.com/test-payment')
+        stale = Payment.objects.create(user=self.user, course=self.course, payment_price=self.course.price)
+
+        response = self.client.post(reverse('payment-create-payment'), {'course': self.course.id})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data['id'], stale.id)
+        self.assertEqual(response.data['payment_url'], 'https://stripe.com/test-payment')
+
+    @override_settings(PAYMENT_REUSE_WINDOW=0)
+    @patch('lms.stripe_services.StripeService.get_or_create_price', return_value='price_test123')
+    @patch('lms.stripe_services.StripeService.create_session')
+    def test_idempotency_key(self, mock_create_session, mock_get_or_create_price):
+        """Idempotency-Key возвращает тот же платёж и передаётся в Stripe"""
+        mock_create_session.return_value = ('sess_test123', 'https://stripe.com/test-payment')
+        url = reverse('payment-create-payment')
+
+        first = self.client.post(url, {'course': self.course.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+        retry = self.client.post(url, {'course': self.course.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+        other_item = self.client.post(url, {'lesson': self.lesson.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(other_item.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        mock_create_session.assert_called_once()
+        self.assertEqual(
+            mock_create_session.call_args.kwargs['idempotency_key'], f'checkout-session:{self.user.pk}:key-1'
+        )
+
+    @patch('lms.stripe_services.StripeService.get_or_create_price', side_effect=ValueError('Stripe down'))
+    def test_failed_payment_frees_idempotency_key(self, mock_get_or_create_price):
+        """После ошибки Stripe запрос с тем же ключом создаёт платёж заново"""
+        url = reverse('payment-create-payment')
+
+        with self.assertLogs('lms.tasks', level='ERROR'):
+            first = self.client.post(url, {'course': self.course.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+            retry = self.client.post(url, {'course': self.course.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(mock_get_or_create_price.call_count, 2)
+        self.assertEqual(Payment.objects.filter(payment_status='failed').count(), 2)
+
+    # ----------------------------
+    # ТЕСТЫ ВИДИМОСТИ И ПОИСКА ПЛАТЕЖЕЙ
+    # ----------------------------
+    def _create_other_payment(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        Payment.objects.create(user=self.user, course=self.course, payment_price=1000)
+        return other, Payment.objects.create(user=other, course=self.course, payment_price=1000)
+
+    def test_payments_scoped_to_user(self):
+        """Пользователь видит только свои платежи, модератор — все"""
+        other, other_payment = self._create_other_payment()
+        url = reverse('payment-list')
+
+        self.assertEqual([p['user'] for p in self.client.get(url).data], [self.user.pk])
+        response = self.client.get(reverse('payment-check-status', args=[other_payment.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.user.groups.add(Group.objects.get_or_create(name='Moderators')[0])
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+    @override_settings(PAYMENT_SEARCH_MODE='prefix')
+    def test_payment_search_prefix_mode(self):
+        """Точный email или префикс username/email"""
+        self.user.groups.add(Group.objects.get_or_create(name='Moderators')[0])
+        other, other_payment = self._create_other_payment()
+        url = reverse('payment-list')
+
+        for term, expected in [('oth', [other.pk]), ('other@example.com', [other.pk]), ('example.com', [])]:
+            response = self.client.get(url, {'search': term})
+            self.assertEqual([p['user'] for p in response.data], expected, term)
+
+    def test_prefix_lookup_depends_on_vendor(self):
+        """Диапазон с PREFIX_END только для SQLite, на остальных СУБД — startswith"""
+        self.assertEqual(
+            PaymentSearchFilter.prefix_q('username', 'oth', 'sqlite'),
+            Q(username__gte='oth', username__lt='oth' + PREFIX_END),
+        )
+        self.assertEqual(PaymentSearchFilter.prefix_q('username', 'oth', 'postgresql'), Q(username__startswith='oth'))
@@ -0,0 +1,60 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseRanking, CourseSubscription, Payment
+from users.models import User
+
+
+class PopularCoursesTests(APITestCase):
+    """Тесты рейтинга популярных курсов"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pass1234")
+            for i in range(3)
+        ]
+        self.courses = [Course.objects.create(name=f"Course {i}", owner=self.owner) for i in range(3)]
+        old = timezone.now() - timedelta(days=10)
+
+        # Course 0: три подписки, из них две старые; Course 1: одна новая подписка и две оплаты
+        for user in self.users:
+            CourseSubscription.objects.create(user=user, course=self.courses[0])
+        CourseSubscription.objects.filter(user__in=self.users[:2]).update(created_at=old)
+        CourseSubscription.objects.create(user=self.users[0], course=self.courses[1])
+        for user in self.users[:2]:
+            Payment.objects.create(user=user, course=self.courses[1], payment_price=100, payment_status="paid")
+        Payment.objects.create(user=self.users[2], course=self.courses[2], payment_price=100)
+
+        call_command("refresh_course_rankings", stdout=io.StringIO())
+        self.client.force_authenticate(self.owner)
+
+    def _popular(self, **params):
+        resp = self.client.get(reverse("course-popular"), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [(row["course_name"], row["subscribers_count"], row["purchases_count"]) for row in resp.data["results"]]
+
+    def test_windows_and_orderings(self):
+        self.assertEqual(self._popular(window="all"), [("Course 0", 3, 0), ("Course 1", 1, 2)])
+        self.assertEqual(self._popular(window="7d"), [("Course 0", 1, 0), ("Course 1", 1, 2)])
+        self.assertEqual(self._popular(window="30d", by="purchases", limit=1), [("Course 1", 1, 2)])
+
+    def test_endpoint_reads_only_ranking_table(self):
+        with self.assertNumQueries(1):
+            self._popular()
+
+    def test_refresh_replaces_window(self):
+        CourseSubscription.objects.all().delete()
+        call_command("refresh_course_rankings", stdout=io.StringIO())
+        self.assertEqual(self._popular(window="7d"), [("Course 1", 0, 2)])
+        self.assertEqual(CourseRanking.objects.filter(window="all").count(), 1)
+
+    def test_invalid_window(self):
+        resp = self.client.get(reverse("course-popular"), {"window": "1y"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
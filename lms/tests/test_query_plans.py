@@ -0,0 +1,83 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from lms.filters import PaymentSearchFilter
+from lms.models import Course, CourseRanking, CourseSubscription, Lesson, Payment
+from lms.views import CourseViewSet, LessonViewSet, PaymentViewSet
+from users.models import User
+
+
+class QueryPlanTests(TestCase):
+    """
+    Регрессионный тест планов запросов: горячие запросы должны
+    идти по индексам, без последовательного сканирования и сортировки.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        course = Course.objects.create(name="Course", owner=self.user)
+        Lesson.objects.create(course=course, name="Lesson", owner=self.user)
+        CourseSubscription.objects.create(user=self.user, course=course)
+        Payment.objects.create(user=self.user, course=course, payment_price=100)
+
+        if connection.vendor == "postgresql":
+            # На маленьких таблицах планировщик всегда выбирает Seq Scan
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+                cursor.execute("SET enable_sort = off")
+
+    def _viewset_queryset(self, viewset_class, params=None):
+        request = Request(APIRequestFactory().get("/", params or {}))
+        request.user = self.user
+        view = viewset_class(request=request, action="list", format_kwarg=None, kwargs={})
+        return view.get_queryset()
+
+    def assertIndexedPlan(self, queryset, allow_full_scan=False):
+        plan = queryset.explain()
+        if connection.vendor == "sqlite":
+            self.assertNotIn("USE TEMP B-TREE", plan, plan)
+            if not allow_full_scan:
+                self.assertIsNone(re.search(r"\bSCAN \w+$", plan, re.MULTILINE), plan)
+        elif connection.vendor == "postgresql":
+            self.assertIsNone(re.search(r"(^|-> )\s*Sort\b", plan, re.MULTILINE), plan)
+            if not allow_full_scan:
+                self.assertNotIn("Seq Scan", plan, plan)
+
+    def test_course_list_for_owner(self):
+        self.assertIndexedPlan(self._viewset_queryset(CourseViewSet, {"expand": "lessons_group"}))
+
+    def test_lesson_list_for_owner(self):
+        self.assertIndexedPlan(self._viewset_queryset(LessonViewSet))
+
+    def test_lessons_prefetch_by_course(self):
+        self.assertIndexedPlan(Lesson.objects.filter(course_id__in=[1, 2]))
+
+    def test_subscription_lookups(self):
+        self.assertIndexedPlan(CourseSubscription.objects.filter(user=self.user, course_id=1))
+        self.assertIndexedPlan(CourseSubscription.objects.filter(course_id=1))
+
+    def test_payments_by_user(self):
+        self.assertIndexedPlan(self._viewset_queryset(PaymentViewSet))
+
+    def test_payment_prefix_search(self):
+        """Поиск по префиксу email идёт по уникальному индексу пользователей"""
+        queryset = self._viewset_queryset(PaymentViewSet)
+        request = Request(APIRequestFactory().get("/", {"search": "own"}))
+        with self.settings(PAYMENT_SEARCH_MODE="prefix"):
+            queryset = PaymentSearchFilter().filter_queryset(request, queryset, PaymentViewSet())
+        self.assertIndexedPlan(queryset)
+
+    def test_moderator_course_list_is_ordered_by_index(self):
+        """Полный список модератора читается по первичному ключу без сортировки"""
+        self.assertIndexedPlan(Course.objects.order_by("id"), allow_full_scan=True)
+
+    def test_popular_courses_read_by_index(self):
+        """Топ курсов читается по индексу рейтинга без сортировки"""
+        self.assertIndexedPlan(CourseRanking.objects.filter(window="30d").order_by("-subscribers_count", "course"))
+        self.assertIndexedPlan(CourseRanking.objects.filter(window="7d").order_by("-purchases_count", "course"))
@@ -0,0 +1,62 @@
+import io
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import stripe
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from lms.models import Course, Payment, RevenueSummary
+from users.models import User
+
+
+def make_session(session_id, payment_status, status="open"):
+    return stripe.StripeObject.construct_from(
+        {"id": session_id, "payment_status": payment_status, "status": status}, "sk_test"
+    )
+
+
+class ReconcilePaymentsTests(TestCase):
+    """Тесты сверки ожидающих платежей со Stripe"""
+
+    def setUp(self):
+        user = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        course = Course.objects.create(name="Course", price=1000, owner=user)
+        for i in range(4):
+            Payment.objects.create(user=user, course=course, payment_price=1000, stripe_payment_id=f"cs_{i}")
+        Payment.objects.filter(stripe_payment_id="cs_3").update(payment_status="failed")
+
+    def _status(self, session_id):
+        return Payment.objects.get(stripe_payment_id=session_id).payment_status
+
+    @patch("lms.stripe_services.StripeService.list_sessions")
+    def test_updates_pending_payments_page_by_page(self, mock_list_sessions):
+        mock_list_sessions.side_effect = [
+            SimpleNamespace(data=[make_session("cs_0", "paid", "complete"), make_session("cs_1", "unpaid")], has_more=True),
+            SimpleNamespace(
+                data=[
+                    make_session("cs_2", "unpaid", "expired"),
+                    make_session("cs_3", "paid", "complete"),
+                    make_session("cs_foreign", "paid", "complete"),
+                ],
+                has_more=False,
+            ),
+        ]
+        out = io.StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("reconcile_payments", "--batch-size", "2", stdout=out)
+        # По выборке и одному bulk_update на каждую страницу
+        payment_queries = [query for query in queries if '"lms_payment"' in query["sql"]]
+        self.assertEqual(len(payment_queries), 4)
+
+        self.assertEqual(self._status("cs_0"), "paid")
+        self.assertEqual(self._status("cs_1"), "pending")
+        self.assertEqual(self._status("cs_2"), "canceled")
+        # Завершённые платежи не пересматриваются
+        self.assertEqual(self._status("cs_3"), "failed")
+        self.assertEqual(mock_list_sessions.call_args_list[1].kwargs["starting_after"], "cs_1")
+        self.assertIn("Checked 5 sessions, updated 2 payments", out.getvalue())
+        summary = RevenueSummary.objects.get()
+        self.assertEqual((summary.payments_count, summary.amount), (1, 1000))
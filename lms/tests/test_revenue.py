@@ -0,0 +1,106 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson, Payment, RevenueSummary
+from users.models import User
+
+
+class RevenueSummaryTests(APITestCase):
+    """Тесты сводки выручки и отчёта по ней"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.course = Course.objects.create(name="Course", price=1000, owner=self.user)
+        self.lesson = Lesson.objects.create(name="Lesson", course=self.course, price=100, owner=self.user)
+        self.today = timezone.localdate()
+
+    def _pay(self, payment):
+        payment.payment_status = "paid"
+        payment.save(update_fields=["payment_status"])
+
+    def _summary(self):
+        return sorted(
+            RevenueSummary.objects.values_list("day", "course", "lesson", "payments_count", "amount"),
+            key=lambda row: (row[0], row[2] is not None),
+        )
+
+    def test_paid_payments_update_summary(self):
+        """Переход в paid добавляет платёж в сводку, повторное сохранение — нет"""
+        first = Payment.objects.create(user=self.user, course=self.course, payment_price=1000)
+        second = Payment.objects.create(user=self.user, course=self.course, payment_price=1000)
+        lesson_payment = Payment.objects.create(user=self.user, lesson=self.lesson, payment_price=100)
+        self.assertFalse(RevenueSummary.objects.exists())
+
+        for payment in (first, second, lesson_payment):
+            self._pay(payment)
+        second.save()
+
+        self.assertEqual(
+            self._summary(),
+            [
+                (self.today, self.course.pk, None, 2, Decimal("2000.00")),
+                (self.today, None, self.lesson.pk, 1, Decimal("100.00")),
+            ],
+        )
+
+        second.delete()
+        Payment.objects.get(pk=lesson_payment.pk).delete()
+        self.assertEqual(
+            self._summary(),
+            [
+                (self.today, self.course.pk, None, 1, Decimal("1000.00")),
+                (self.today, None, self.lesson.pk, 0, Decimal("0.00")),
+            ],
+        )
+
+    def test_rebuild_matches_incremental_updates(self):
+        for _ in range(3):
+            self._pay(Payment.objects.create(user=self.user, course=self.course, payment_price=1000))
+        self._pay(Payment.objects.create(user=self.user, lesson=self.lesson, payment_price=100))
+        Payment.objects.create(user=self.user, course=self.course, payment_price=1000)
+        incremental = self._summary()
+
+        RevenueSummary.objects.all().delete()
+        call_command("rebuild_revenue_summary", stdout=io.StringIO())
+
+        self.assertEqual(self._summary(), incremental)
+
+    def test_revenue_report(self):
+        moderator = User.objects.create_user(username="moder", email="moder@example.com", password="pass1234")
+        moderator.groups.add(Group.objects.get_or_create(name="Moderators")[0])
+        yesterday = self.today - datetime.timedelta(days=1)
+        RevenueSummary.objects.create(day=yesterday, course=self.course, payments_count=2, amount=2000)
+        RevenueSummary.objects.create(day=self.today, course=self.course, payments_count=1, amount=1000)
+        RevenueSummary.objects.create(day=self.today, lesson=self.lesson, payments_count=3, amount=300)
+        RevenueSummary.objects.create(day=self.today + datetime.timedelta(days=1), course=self.course, amount=5)
+
+        url = reverse("payment-revenue")
+        params = {"date_from": yesterday, "date_to": self.today}
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url, params).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(moderator)
+        # Проверка роли, строки отчёта и итог — без обращения к таблице платежей
+        with self.assertNumQueries(3):
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["total"], {"payments_count": 6, "amount": Decimal("3300.00")})
+        self.assertEqual([row["payments_count"] for row in resp.data["results"]], [2, 4])
+
+        resp = self.client.get(url, {**params, "group_by": "item"})
+        self.assertEqual(
+            [(row["course"], row["lesson"], row["payments_count"]) for row in resp.data["results"]],
+            [(None, self.lesson.pk, 3), (self.course.pk, None, 3)],
+        )
+
+        resp = self.client.get(url, {"date_from": self.today, "date_to": yesterday})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,115 @@
+import io
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Lesson
+from users.models import User
+
+VIDEO = "https://www.youtube.com/watch?v=abcd"
+
+
+class SearchTests(APITestCase):
+    """Тесты полнотекстового поиска по курсам и урокам"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="pass1234"
+        )
+        self.other = User.objects.create_user(
+            username="other", email="other@example.com", password="pass1234"
+        )
+        self.course = Course.objects.create(
+            name="Python для начинающих", description="Базовый курс", owner=self.owner
+        )
+        self.lesson = Lesson.objects.create(
+            course=self.course, name="Циклы", description="Циклы в Python", video_url=VIDEO, owner=self.owner
+        )
+        self.foreign = Course.objects.create(name="Python для профи", owner=self.other)
+        self.url = reverse("search")
+
+    def _search(self, user, **params):
+        self.client.force_authenticate(user)
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp
+
+    def test_ranked_results_for_owner(self):
+        """Совпадение в названии ранжируется выше, чужие курсы не видны"""
+        resp = self._search(self.owner, q="python")
+        found = [(item["type"], item["id"]) for item in resp.data["results"]]
+        self.assertEqual(found, [("course", self.course.id), ("lesson", self.lesson.id)])
+
+    def test_moderator_sees_all(self):
+        """Модератор ищет среди всех курсов"""
+        group, _ = Group.objects.get_or_create(name="Moderators")
+        self.other.groups.add(group)
+        resp = self._search(self.other, q="Python")
+        self.assertEqual(len(resp.data["results"]), 3)
+
+    def test_index_updated_on_save_and_delete(self):
+        """Индекс обновляется при сохранении и удалении"""
+        self.lesson.name = "Функции"
+        self.lesson.description = ""
+        self.lesson.save()
+        self.assertEqual(self._search(self.owner, q="функции").data["results"][0]["id"], self.lesson.id)
+        self.assertEqual(len(self._search(self.owner, q="циклы").data["results"]), 0)
+
+        self.course.delete()
+        self.assertEqual(self._search(self.owner, q="python").data["results"], [])
+
+    def test_keyset_pagination(self):
+        """Курсор проходит все результаты без повторов"""
+        for i in range(7):
+            Lesson.objects.create(
+                course=self.course, name=f"Python урок {i}", video_url=VIDEO, owner=self.owner
+            )
+        seen = []
+        resp = self._search(self.owner, q="python", page_size=3)
+        while True:
+            seen.extend((item["type"], item["id"]) for item in resp.data["results"])
+            if not resp.data["next"]:
+                break
+            resp = self.client.get(resp.data["next"])
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+
+    def test_special_characters_and_empty_query(self):
+        """Спецсимволы FTS не ломают запрос, пустой запрос — ошибка"""
+        self._search(self.owner, q='python" OR (')
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_size_is_clamped(self):
+        """page_size вне допустимого диапазона приводится к 1..max_page_size"""
+        Lesson.objects.create(course=self.course, name="Python урок", video_url=VIDEO, owner=self.owner)
+        for page_size in (0, -2):
+            resp = self._search(self.owner, q="python", page_size=page_size)
+            self.assertEqual(len(resp.data["results"]), 1)
+            self.assertIsNotNone(resp.data["next"])
+
+    def test_unsupported_database(self):
+        """Без поискового бэкенда для СУБД — 501, а не 500"""
+        self.client.force_authenticate(self.owner)
+        with patch("lms.search.get_backend", return_value=None):
+            resp = self.client.get(self.url, {"q": "python"})
+        self.assertEqual(resp.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_rebuild_index_after_loaddata(self):
+        """Фикстуры загружаются без сигналов; rebuild_search_index делает их доступными для поиска"""
+        Course.objects.all().delete()
+        call_command("loaddata", "cousres", "lessons", verbosity=0)
+        group, _ = Group.objects.get_or_create(name="Moderators")
+        self.other.groups.add(group)
+        self.assertEqual(self._search(self.other, q="SQL").data["results"], [])
+
+        out = io.StringIO()
+        call_command("rebuild_search_index", batch_size=2, stdout=out)
+        names = [item["name"] for item in self._search(self.other, q="SQL").data["results"]]
+        self.assertIn("SQL и базы данных", names)
+        self.assertTrue(self._search(self.other, q="Python").data["results"])
+        self.assertIn(f"{Course.objects.count()} courses, {Lesson.objects.count()} lessons", out.getvalue())
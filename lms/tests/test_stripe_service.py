@@ -1,23 +1,77 @@
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
 
-os.environ['DJANGO_SETTINGS_MODULE'] = 'lms.tests.test_settings'
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-from unittest.mock import patch, MagicMock
-from django.test import TestCase
-from lms.stripe_services import StripeService
+from lms.stripe_services import StripeService, build_stripe_client
 
 
 class StripeServiceTests(TestCase):
-    @patch('stripe.Product.create')
-    def test_create_product(self, mock_create_product):
+    def test_create_product(self):
         """Тест создания продукта в Stripe"""
-        mock_create_product.return_value = MagicMock(id='prod_test123')
+        client = MagicMock()
+        client.v1.products.create.return_value = MagicMock(id='prod_test123')
 
-        service = StripeService()
+        service = StripeService(client=client)
         product = service.create_product('Test Product', 'Test Description')
 
         self.assertEqual(product.id, 'prod_test123')
-        mock_create_product.assert_called_once_with(
-            name='Test Product',
-            description='Test Description'
+        client.v1.products.create.assert_called_once_with(
+            params={'name': 'Test Product', 'description': 'Test Description'}
         )
+
+    def test_create_session_idempotency_key(self):
+        """Ключ идемпотентности передаётся в Stripe в опциях запроса"""
+        client = MagicMock()
+        client.v1.checkout.sessions.create.return_value = MagicMock(id='cs_1', url='https://stripe.com/cs_1')
+
+        service = StripeService(client=client)
+        self.assertEqual(
+            service.create_session('price_1', 'http://s/', 'http://c/', idempotency_key='key-1'),
+            ('cs_1', 'https://stripe.com/cs_1'),
+        )
+        self.assertEqual(client.v1.checkout.sessions.create.call_args.kwargs['options'], {'idempotency_key': 'key-1'})
+
+    @override_settings(
+        STRIPE_SECRET_KEY='sk_test_123',
+        STRIPE_CONNECT_TIMEOUT=1.5,
+        STRIPE_READ_TIMEOUT=7,
+        STRIPE_MAX_NETWORK_RETRIES=3,
+        STRIPE_HTTP_POOL_SIZE=25,
+    )
+    def test_client_configuration(self):
+        """Клиент использует общий пул соединений, таймауты и повторы из настроек"""
+        client = build_stripe_client(api_base='http://127.0.0.1:12111')
+        requestor = client._requestor
+        http_client = requestor._client
+
+        self.assertEqual(http_client._timeout, (1.5, 7))
+        self.assertEqual(http_client._session.get_adapter('https://api.stripe.com')._pool_maxsize, 25)
+        self.assertEqual(requestor._options.max_network_retries, 3)
+        self.assertEqual(requestor._options.base_addresses['api'], 'http://127.0.0.1:12111')
+
+    @override_settings(STRIPE_STATUS_CACHE_TIMEOUT=60)
+    def test_cached_payment_status_single_flight(self):
+        """Одновременные опросы одной сессии делают один запрос в Stripe"""
+        cache.clear()
+        calls = []
+        lock = threading.Lock()
+
+        def retrieve(session_id):
+            with lock:
+                calls.append(session_id)
+            time.sleep(0.05)
+            return MagicMock(payment_status='unpaid')
+
+        client = MagicMock()
+        client.v1.checkout.sessions.retrieve.side_effect = retrieve
+        service = StripeService(client=client)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda _: service.get_cached_payment_status('cs_test_1'), range(8)))
+
+        self.assertEqual(statuses, ['pending'] * 8)
+        self.assertEqual(calls, ['cs_test_1'])
@@ -0,0 +1,98 @@
+import hashlib
+import hmac
+import json
+import time
+from unittest.mock import patch
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, Payment, StripeEvent
+from users.models import User
+
+WEBHOOK_SECRET = "whsec_test"
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class StripeWebhookTests(APITestCase):
+    """Тесты вебхука Stripe"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        course = Course.objects.create(name="Course", price=1000, owner=self.user)
+        self.payment = Payment.objects.create(
+            user=self.user, course=course, payment_price=1000, stripe_payment_id="cs_test_1"
+        )
+        self.url = reverse("stripe-webhook")
+
+    def _post_event(self, event_type, event_id="evt_1", payment_status="paid", signature=None):
+        payload = json.dumps(
+            {
+                "id": event_id,
+                "object": "event",
+                "type": event_type,
+                "data": {"object": {"id": "cs_test_1", "object": "checkout.session", "payment_status": payment_status}},
+            }
+        )
+        timestamp = int(time.time())
+        if signature is None:
+            signature = hmac.new(
+                WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+            ).hexdigest()
+        return self.client.post(
+            self.url,
+            data=payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={signature}",
+        )
+
+    def _status(self):
+        self.payment.refresh_from_db()
+        return self.payment.payment_status
+
+    def test_completed_marks_payment_paid(self):
+        resp = self._post_event("checkout.session.completed")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._status(), "paid")
+
+    def test_completed_unpaid_keeps_pending(self):
+        self._post_event("checkout.session.completed", payment_status="unpaid")
+        self.assertEqual(self._status(), "pending")
+
+    def test_expired_and_failed(self):
+        self._post_event("checkout.session.expired")
+        self.assertEqual(self._status(), "canceled")
+        self._post_event("checkout.session.async_payment_failed", event_id="evt_2")
+        self.assertEqual(self._status(), "failed")
+
+    def test_invalid_signature_rejected(self):
+        resp = self._post_event("checkout.session.completed", signature="bad")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._status(), "pending")
+
+    @override_settings(STRIPE_WEBHOOK_SECRET=None)
+    def test_webhook_not_configured(self):
+        resp = self._post_event("checkout.session.completed", signature="any")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self._status(), "pending")
+
+    def test_duplicate_event_processed_once(self):
+        self._post_event("checkout.session.expired")
+        Payment.objects.filter(pk=self.payment.pk).update(payment_status="pending")
+
+        resp = self._post_event("checkout.session.expired")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._status(), "pending")
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    @patch("lms.stripe_services.StripeService.get_payment_status")
+    def test_check_status_answers_locally(self, mock_get_payment_status):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse("payment-check-status", args=[self.payment.id]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["payment_status"], "pending")
+        mock_get_payment_status.assert_not_called()
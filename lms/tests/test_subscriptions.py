@@ -0,0 +1,170 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from lms.models import Course, CourseSubscription
+from users.models import User
+
+
+class SubscriptionStatementTests(APITestCase):
+    """Подписка, отписка и переключение — одним запросом к таблице подписок"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.course = Course.objects.create(name="Course", owner=self.user)
+        self.client.force_authenticate(self.user)
+
+    def _subscription_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            resp = getattr(self.client, method)(url, data, format="json")
+        statements = [q["sql"] for q in queries if "lms_coursesubscription" in q["sql"]]
+        return resp, statements
+
+    def _subscribers_count(self):
+        self.course.refresh_from_db()
+        return self.course.subscribers_count
+
+    def test_subscribe_and_unsubscribe(self):
+        subscribe_url = reverse("course-subscribe", args=[self.course.pk])
+        resp, statements = self._subscription_queries("post", subscribe_url)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data["course"], self.course.pk)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("INSERT"))
+        self.assertEqual(self._subscribers_count(), 1)
+
+        resp, _ = self._subscription_queries("post", subscribe_url)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._subscribers_count(), 1)
+
+        resp, statements = self._subscription_queries("delete", reverse("course-unsubscribe", args=[self.course.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("DELETE"))
+        self.assertEqual(self._subscribers_count(), 0)
+
+    def test_subscribe_missing_course(self):
+        resp = self.client.post(reverse("course-subscribe", args=[self.course.pk + 100]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(CourseSubscription.objects.exists())
+
+    def test_toggle(self):
+        url = reverse("course-subscription")
+        resp, statements = self._subscription_queries("post", url, {"course": self.course.pk})
+        self.assertEqual(resp.data["message"], "Подписка добавлена")
+        # DELETE без затронутых строк и INSERT
+        self.assertEqual([sql.split()[0] for sql in statements], ["DELETE", "INSERT"])
+
+        resp, statements = self._subscription_queries("post", url, {"course": self.course.pk})
+        self.assertEqual(resp.data["message"], "Подписка удалена")
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(self._subscribers_count(), 0)
+
+        for course_id in (self.course.pk + 100, "abc", None):
+            resp = self.client.post(url, {"course": course_id}, format="json")
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkSubscriptionTests(APITestCase):
+    """Массовая подписка и отписка"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", email="owner@example.com", password="pass1234")
+        self.courses = [Course.objects.create(name=f"Course {i}", owner=self.user) for i in range(5)]
+        self.ids = [course.pk for course in self.courses]
+        self.url = reverse("course-subscription-bulk")
+        self.client.force_authenticate(self.user)
+        CourseSubscription.objects.create(user=self.user, course=self.courses[0])
+        CourseSubscription.objects.create(user=self.user, course=self.courses[4])
+
+    def _counts(self):
+        return list(Course.objects.filter(pk__in=self.ids).order_by("pk").values_list("subscribers_count", flat=True))
+
+    def test_bulk_subscribe_and_unsubscribe(self):
+        # Проверка курсов, INSERT, DELETE, итоговый список и запросы счётчиков/транзакции
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(
+                self.url, {"subscribe": self.ids[:3], "unsubscribe": [self.ids[4]]}, format="json"
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {"added": self.ids[1:3], "removed": [self.ids[4]], "courses": self.ids[:3]})
+        self.assertEqual(self._counts(), [1, 1, 1, 0, 0])
+        subscription_queries = [q["sql"] for q in queries if "lms_coursesubscription" in q["sql"]]
+        self.assertEqual([sql.split()[0] for sql in subscription_queries], ["INSERT", "DELETE", "SELECT"])
+
+    def test_unknown_course_rejected(self):
+        resp = self.client.post(self.url, {"subscribe": [self.ids[1], 10_000]}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(CourseSubscription.objects.count(), 2)
+
+    def test_validation(self):
+        for data in ({}, {"subscribe": [self.ids[1]], "unsubscribe": [self.ids[1]]}, {"subscribe": ["x"]}):
+            resp = self.client.post(self.url, data, format="json")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+
+@override_settings(LMS_SUBSCRIPTIONS_CACHE_TIMEOUT=60)
+class SubscribedCoursesCacheTests(APITestCase):
+    """Кэш множества подписок пользователя и список «Мои подписки»"""
+
+    def setUp(self):
+        cache.clear()
+        self.moderator = User.objects.create_user(username="moder", email="moder@example.com", password="pass1234")
+        self.moderator.groups.add(Group.objects.get_or_create(name="Moderators")[0])
+        self.courses = [Course.objects.create(name=f"Course {i}", owner=self.moderator) for i in range(4)]
+        CourseSubscription.objects.create(user=self.moderator, course=self.courses[1])
+        self.client.force_authenticate(self.moderator)
+
+    def _subscribed_flags(self):
+        resp = self.client.get(reverse("course-list"), {"fields": "name,is_subscribed"})
+        return [item["is_subscribed"] for item in resp.data["results"]]
+
+    def test_is_subscribed_from_cached_set(self):
+        self.assertEqual(self._subscribed_flags(), [False, True, False, False])
+        # Повторная страница: проверка роли и выборка курсов, без запроса подписок
+        with CaptureQueriesContext(connection) as queries:
+            self._subscribed_flags()
+        self.assertFalse([q for q in queries if "lms_coursesubscription" in q["sql"]])
+
+    def test_cache_invalidated_on_subscription_changes(self):
+        self._subscribed_flags()
+        self.client.post(reverse("course-subscribe", args=[self.courses[0].pk]))
+        self.assertEqual(self._subscribed_flags(), [True, True, False, False])
+
+        self.client.post(reverse("course-subscription"), {"course": self.courses[1].pk}, format="json")
+        self.assertEqual(self._subscribed_flags(), [True, False, False, False])
+
+        self.client.post(reverse("course-subscription-bulk"), {"subscribe": [self.courses[3].pk]}, format="json")
+        self.assertEqual(self._subscribed_flags(), [True, False, False, True])
+
+        CourseSubscription.objects.filter(course=self.courses[0]).delete()
+        self.assertEqual(self._subscribed_flags(), [False, False, False, True])
+
+    def test_my_subscriptions(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="pass1234")
+        course = Course.objects.create(name="Other course", owner=other)
+        CourseSubscription.objects.create(user=self.moderator, course=course)
+
+        # Курсы чужих владельцев тоже попадают в «Мои подписки»
+        self.client.force_authenticate(other)
+        self.client.post(reverse("course-subscribe", args=[self.courses[2].pk]))
+        resp = self.client.get(reverse("course-subscribed"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in resp.data["results"]], ["Course 2"])
+        self.assertTrue(resp.data["results"][0]["is_subscribed"])
+
+    @override_settings(LMS_SUBSCRIPTIONS_CACHE_TIMEOUT=0)
+    def test_without_cache_is_subscribed_in_page_query(self):
+        """Без кэша is_subscribed считается подзапросом, а не загрузкой всех подписок"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._subscribed_flags(), [False, True, False, False])
+        self.assertFalse([q for q in queries if q["sql"].startswith('SELECT "lms_coursesubscription"')])
+        self.assertIn("EXISTS", queries[-1]["sql"].upper())
+
+        resp = self.client.get(reverse("course-subscribed"))
+        self.assertEqual([item["name"] for item in resp.data["results"]], ["Course 1"])
@@ -1,39 +1,69 @@
-from django.db import IntegrityError
+import base64
+import binascii
+import csv
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch, Sum, Value
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from rest_framework import viewsets, status, filters
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
-from lms.models import Course, Lesson, CourseSubscription, Payment
+from lms import notifications, search, subscriptions
+from lms.models import Course, CourseRanking, Lesson, CourseSubscription, Payment, RevenueSummary, StripeEvent
 from lms.serializers import (
     CourseSerializer,
+    CourseRankingSerializer,
+    PopularCoursesSerializer,
     LessonSerializer,
+    LessonBulkItemSerializer,
     CourseSubscriptionSerializer,
+    CourseSubscriptionBulkSerializer,
     PaymentSerializer,
     CreatePaymentSerializer,
     PaymentStatusSerializer,
+    RevenueReportSerializer,
 )
+from lms.filters import PaymentSearchFilter
+from lms.mixins import ConditionalGetMixin
 from lms.paginators import CoursePaginator, LessonPaginator
+from lms.signals import adjust_course_counters, touch_courses
+from lms.subscription_cache import get_subscribed_course_ids, subscriptions_cache_enabled
 from users.permissions import IsModerator, IsOwner
-from lms.stripe_services import StripeService
+from users.roles import is_moderator
+from lms.stripe_services import PAYMENT_TERMINAL_STATUSES, StripeService
+from lms.tasks import create_checkout_session, enqueue, start_checkout_session
 
 
 # =====================================================
 # COURSE VIEWSET
 # =====================================================
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Управление курсами"""
 
     queryset = Course.objects.all().order_by("id")
     serializer_class = CourseSerializer
     pagination_class = CoursePaginator
+    export_chunk_size = 500
+    export_csv_header = [
+        "course_id", "course_name", "course_description", "course_price", "course_owner",
+        "lesson_id", "lesson_name", "lesson_description", "lesson_video_url", "lesson_price",
+    ]
 
     def get_permissions(self):
         action_permissions = {
@@ -43,6 +73,9 @@ class CourseViewSet(viewsets.ModelViewSet):
             "retrieve": [IsAuthenticated, IsModerator | IsOwner],
             "destroy": [IsAuthenticated, ~IsModerator & IsOwner],
             "list": [IsAuthenticated],
+            "export": [IsAuthenticated, IsModerator],
+            "subscribed": [IsAuthenticated],
+            "popular": [IsAuthenticated],
         }
         self.permission_classes = action_permissions.get(self.action, [IsAuthenticated])
         return [permission() for permission in self.permission_classes]
@@ -52,21 +85,149 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        if self.action == "list" and not self.request.user.groups.filter(name="Moderators").exists():
-            qs = qs.filter(owner=self.request.user)
+        user = self.request.user
+        if self.action == "list" and not is_moderator(self.request):
+            qs = qs.filter(owner=user)
+
+        cached_subscriptions = subscriptions_cache_enabled()
+        if self.action == "subscribed":
+            if cached_subscriptions:
+                qs = qs.filter(pk__in=get_subscribed_course_ids(self.request))
+            else:
+                qs = qs.filter(pk__in=CourseSubscription.objects.filter(user=user).values("course_id"))
+
+        # Уроки подгружаем одним prefetch и только при ?expand=lessons_group, чтобы
+        # стоимость страницы не зависела от её размера. is_subscribed проверяется
+        # по кэшированному множеству подписок пользователя (lms.subscription_cache),
+        # а без кэша — подзапросом в той же выборке. lessons_count и subscribers_count
+        # хранятся в самой таблице курсов
+        requested = CourseSerializer.get_requested_fields(self.request)
+        if "is_subscribed" in requested and not cached_subscriptions:
+            if user.is_authenticated:
+                is_subscribed = Exists(CourseSubscription.objects.filter(course=OuterRef("pk"), user=user))
+            else:
+                is_subscribed = Value(False)
+            qs = qs.annotate(is_subscribed=is_subscribed)
+        if "lessons_group" in requested:
+            qs = qs.prefetch_related("lessons")
         return qs
 
+    @action(detail=False, methods=["get"])
+    def subscribed(self, request, *args, **kwargs):
+        """Мои подписки: курсы, на которые подписан пользователь"""
+        return self.list(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    def popular(self, request):
+        """
+        Популярные курсы из предрассчитанного рейтинга (команда refresh_course_rankings).
+
+        ?window=7d|30d|all — окно, ?by=subscribers|purchases — показатель, ?limit= — размер топа.
+        """
+        params = PopularCoursesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        window = params.validated_data["window"]
+        order = PopularCoursesSerializer.ORDER_FIELDS[params.validated_data["by"]]
+
+        rankings = list(
+            CourseRanking.objects.filter(window=window).order_by(order, "course")[: params.validated_data["limit"]]
+        )
+        return Response(
+            {
+                "window": window,
+                "refreshed_at": rankings[0].refreshed_at if rankings else None,
+                "results": CourseRankingSerializer(rankings, many=True).data,
+            }
+        )
+
+    def iter_export_courses(self):
+        """Курсы с уроками, читаемые пачками: память не зависит от размера каталога"""
+        lessons = Prefetch("lessons", queryset=Lesson.objects.order_by("id"))
+        queryset = Course.objects.order_by("id").prefetch_related(lessons)
+        return queryset.iterator(chunk_size=self.export_chunk_size)
+
+    @staticmethod
+    def export_course_dict(course):
+        return {
+            "id": course.id,
+            "name": course.name,
+            "description": course.description,
+            "price": str(course.price),
+            "owner": course.owner_id,
+            "lessons_count": course.lessons_count,
+            "subscribers_count": course.subscribers_count,
+            "lessons": [
+                {
+                    "id": lesson.id,
+                    "name": lesson.name,
+                    "description": lesson.description,
+                    "video_url": lesson.video_url,
+                    "price": str(lesson.price),
+                }
+                for lesson in course.lessons.all()
+            ],
+        }
+
+    def stream_ndjson(self):
+        for course in self.iter_export_courses():
+            yield json.dumps(self.export_course_dict(course), ensure_ascii=False) + "\n"
+
+    def stream_csv(self):
+        class Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_csv_header)
+        for course in self.iter_export_courses():
+            course_row = [course.id, course.name, course.description, course.price, course.owner_id]
+            lessons = course.lessons.all()
+            if not lessons:
+                yield writer.writerow(course_row + [""] * 5)
+            for lesson in lessons:
+                yield writer.writerow(
+                    course_row + [lesson.id, lesson.name, lesson.description, lesson.video_url, lesson.price]
+                )
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Потоковая выгрузка всего каталога с уроками.
+
+        ?export_format=ndjson (по умолчанию) — один курс на строку,
+        ?export_format=csv — одна строка на урок.
+        """
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format == "csv":
+            response = StreamingHttpResponse(self.stream_csv(), content_type="text/csv; charset=utf-8")
+        elif export_format == "ndjson":
+            response = StreamingHttpResponse(self.stream_ndjson(), content_type="application/x-ndjson")
+        else:
+            return Response({"error": "Поддерживаются форматы ndjson и csv"}, status=status.HTTP_400_BAD_REQUEST)
+        response["Content-Disposition"] = f'attachment; filename="courses.{export_format}"'
+        return response
+
+    def get_object_version(self, obj):
+        # is_subscribed зависит от пользователя, а subscribers_count не меняет updated_at,
+        # поэтому оба входят в ETag, а Last-Modified по updated_at не отдаётся
+        is_subscribed = getattr(obj, "is_subscribed", None)
+        if is_subscribed is None and "is_subscribed" in CourseSerializer.get_requested_fields(self.request):
+            is_subscribed = obj.pk in get_subscribed_course_ids(self.request)
+        parts = (obj.pk, obj.updated_at, obj.subscribers_count, is_subscribed)
+        return parts, None
+
 
 # =====================================================
 # LESSON VIEWSET
 # =====================================================
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Управление уроками"""
 
     queryset = Lesson.objects.all().order_by("id")
     serializer_class = LessonSerializer
     pagination_class = LessonPaginator
+    bulk_max_size = 500
 
     def get_permissions(self):
         action_permissions = {
@@ -85,10 +246,213 @@ class LessonViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        if self.action == "list" and not self.request.user.groups.filter(name="Moderators").exists():
+        if self.action == "list" and not is_moderator(self.request):
             qs = qs.filter(owner=self.request.user)
         return qs
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Массовое создание и обновление уроков.
+
+        Принимает список уроков: элементы с "id" обновляются, без "id" — создаются.
+        Курсы и обновляемые уроки загружаются двумя запросами, запись выполняется
+        через bulk_create/bulk_update в одной транзакции. Если хотя бы один элемент
+        невалиден, ничего не сохраняется и возвращается список ошибок по элементам.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Ожидается непустой список уроков"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_size:
+            return Response(
+                {"error": f"Не более {self.bulk_max_size} уроков за запрос"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        errors, to_create, to_update, update_fields = self.parse_bulk_items(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        lessons = self.save_bulk_items(to_create, to_update, update_fields)
+        serializer = LessonSerializer(lessons, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def bulk_ids(items, key):
+        """Целые значения поля key из элементов запроса (некорректные пропускаются)."""
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item[key]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return ids
+
+    def parse_bulk_items(self, items):
+        """
+        Проверка элементов массового запроса.
+
+        Возвращает ошибки по элементам (пустой словарь — элемент валиден), новые уроки,
+        изменённые уроки и множество изменённых полей.
+        """
+        moderator = is_moderator(self.request)
+        courses = Course.objects.in_bulk(self.bulk_ids(items, "course"))
+        existing = Lesson.objects.filter(pk__in=self.bulk_ids(items, "id"))
+        if not moderator:
+            existing = existing.filter(owner=self.request.user)
+        existing = existing.in_bulk()
+
+        context = {**self.get_serializer_context(), "courses": courses}
+        errors, to_create, to_update, update_fields = [], [], [], set()
+        for item in items:
+            error, instance, data = self.parse_bulk_item(item, existing, moderator, context)
+            errors.append(error)
+            if error:
+                continue
+            if instance is None:
+                to_create.append(Lesson(owner=self.request.user, **data))
+            else:
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                update_fields.update(data)
+                to_update.append(instance)
+        return errors, to_create, to_update, update_fields
+
+    @staticmethod
+    def parse_bulk_item(item, existing, moderator, context):
+        """Ошибка, обновляемый урок (None — новый) и проверенные данные одного элемента."""
+        if not isinstance(item, dict):
+            return {"non_field_errors": ["Ожидается объект урока"]}, None, None
+
+        lesson_id = item.get("id")
+        instance = None
+        if lesson_id is not None:
+            try:
+                instance = existing.get(int(lesson_id))
+            except (TypeError, ValueError):
+                pass
+            if instance is None:
+                return {"id": ["Урок не найден"]}, None, None
+        elif moderator:
+            return {"non_field_errors": ["Модератор не может создавать уроки"]}, None, None
+
+        serializer = LessonBulkItemSerializer(
+            instance=instance, data=item, partial=instance is not None, context=context
+        )
+        if not serializer.is_valid():
+            return serializer.errors, None, None
+
+        data = dict(serializer.validated_data)
+        data.pop("id", None)
+        return {}, instance, data
+
+    @staticmethod
+    def save_bulk_items(to_create, to_update, update_fields):
+        """Запись уроков одной транзакцией; возвращает созданные и обновлённые уроки."""
+        # bulk_* не вызывают сигналы, поэтому версии курсов и счётчики уроков обновляем явно
+        touched = {lesson.course_id for lesson in to_create + to_update}
+        touched.update(lesson._loaded_course_id for lesson in to_update)
+        deltas = Counter(lesson.course_id for lesson in to_create)
+        for lesson in to_update:
+            if lesson._loaded_course_id != lesson.course_id:
+                deltas[lesson._loaded_course_id] -= 1
+                deltas[lesson.course_id] += 1
+        with transaction.atomic():
+            created = Lesson.objects.bulk_create(to_create)
+            if to_update:
+                now = timezone.now()
+                for lesson in to_update:
+                    lesson.updated_at = now
+                Lesson.objects.bulk_update(to_update, sorted(update_fields | {"updated_at"}))
+            adjust_course_counters("lessons_count", deltas)
+            touch_courses(touched)
+            search.index_objects("lesson", created + to_update)
+            notifications.schedule_course_notifications(touched)
+        return created + to_update
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+
+class SearchView(APIView):
+    """
+    Полнотекстовый поиск по курсам и урокам (название и описание).
+
+    Результаты ранжируются и листаются курсором (?cursor=), без OFFSET и COUNT.
+    Обычный пользователь ищет среди своих курсов и уроков, модератор — среди всех.
+    """
+
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    @staticmethod
+    def encode_cursor(score, doc_id):
+        return base64.urlsafe_b64encode(json.dumps([score, doc_id]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(value):
+        try:
+            score, doc_id = json.loads(base64.urlsafe_b64decode(value.encode()))
+            return float(score), int(doc_id)
+        except (binascii.Error, ValueError, TypeError):
+            return None
+
+    def get_page_size(self, request):
+        """page_size из запроса, приведённый к 1..max_page_size."""
+        try:
+            page_size = int(request.query_params.get("page_size", self.page_size))
+        except ValueError:
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    @staticmethod
+    def build_results(rows):
+        """Элементы выдачи по строкам (kind, id, score): курсы и уроки грузятся двумя запросами."""
+        objects = {
+            "course": Course.objects.in_bulk([pk for kind, pk, _ in rows if kind == "course"]),
+            "lesson": Lesson.objects.in_bulk([pk for kind, pk, _ in rows if kind == "lesson"]),
+        }
+        results = []
+        for kind, pk, score in rows:
+            obj = objects[kind].get(pk)
+            if obj is not None:
+                results.append(
+                    {"type": kind, "id": pk, "name": obj.name, "description": obj.description, "rank": score}
+                )
+        return results
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "Необходимо указать параметр q"}, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = self.get_page_size(request)
+
+        after = None
+        if "cursor" in request.query_params:
+            after = self.decode_cursor(request.query_params["cursor"])
+            if after is None:
+                return Response({"error": "Неверный курсор"}, status=status.HTTP_400_BAD_REQUEST)
+
+        owner_id = None if is_moderator(request) else request.user.pk
+        try:
+            rows = search.search(query, owner_id=owner_id, after=after, limit=page_size + 1)
+        except NotImplementedError as e:
+            return Response({"error": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        results = self.build_results(rows)
+
+        next_url = None
+        if has_next:
+            kind, pk, score = rows[-1]
+            cursor = self.encode_cursor(score, search.make_doc_id(kind, pk))
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", cursor)
+
+        return Response({"next": next_url, "results": results})
+
 
 # =====================================================
 # COURSE SUBSCRIPTION (FUNCTION-BASED VIEWS)
@@ -97,13 +461,13 @@ class LessonViewSet(viewsets.ModelViewSet):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def subscribe_to_course(request, course_id: int):
-    """Подписка пользователя на курс"""
-    course = get_object_or_404(Course, id=course_id)
-
-    if CourseSubscription.objects.filter(user=request.user, course=course).exists():
+    """Подписка пользователя на курс (один INSERT, см. lms.subscriptions)"""
+    subscription = subscriptions.subscribe(request.user.pk, course_id)
+    if subscription is None:
+        # Запрос только на пути ошибки: нет курса или подписка уже есть
+        get_object_or_404(Course, id=course_id)
         return Response({"detail": "Вы уже подписаны на этот курс"}, status=status.HTTP_400_BAD_REQUEST)
 
-    subscription = CourseSubscription.objects.create(user=request.user, course=course)
     serializer = CourseSubscriptionSerializer(subscription)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -111,12 +475,9 @@ def subscribe_to_course(request, course_id: int):
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def unsubscribe_from_course(request, course_id: int):
-    """Отписка пользователя от курса"""
-    subscription = CourseSubscription.objects.filter(user=request.user, course_id=course_id).first()
-    if not subscription:
+    """Отписка пользователя от курса (один DELETE)"""
+    if not subscriptions.unsubscribe(request.user.pk, course_id):
         return Response({"detail": "Подписка не найдена"}, status=status.HTTP_404_NOT_FOUND)
-
-    subscription.delete()
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -130,21 +491,51 @@ class CourseSubscriptionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        course_id = request.data.get("course")
-        course = get_object_or_404(Course, id=course_id)
+        try:
+            course_id = int(request.data.get("course"))
+        except (TypeError, ValueError):
+            raise Http404
 
-        existing = CourseSubscription.objects.filter(user=request.user, course=course)
-
-        if existing.exists():
-            existing.delete()
-            message = "Подписка удалена"
-        else:
-            CourseSubscription.objects.create(user=request.user, course=course)
-            message = "Подписка добавлена"
+        subscribed = subscriptions.toggle(request.user.pk, course_id)
+        if subscribed is None:
+            raise Http404
 
+        message = "Подписка добавлена" if subscribed else "Подписка удалена"
         return Response({"message": message})
 
 
+class CourseSubscriptionBulkView(APIView):
+    """
+    Массовая подписка и отписка: {"subscribe": [id, ...], "unsubscribe": [id, ...]}.
+
+    Курсы проверяются одним запросом IN, подписки добавляются одним INSERT
+    и удаляются одним DELETE. В ответе — добавленные, удалённые и все
+    курсы, на которые пользователь подписан после операции.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = CourseSubscriptionBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subscribe_ids = set(serializer.validated_data["subscribe"])
+        unsubscribe_ids = set(serializer.validated_data["unsubscribe"])
+
+        missing = subscribe_ids - set(Course.objects.filter(pk__in=subscribe_ids).values_list("pk", flat=True))
+        if missing:
+            return Response(
+                {"subscribe": [f"Курс {course_id} не найден" for course_id in sorted(missing)]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            added = subscriptions.subscribe_many(request.user.pk, subscribe_ids)
+            removed = subscriptions.unsubscribe_many(request.user.pk, unsubscribe_ids)
+
+        courses = CourseSubscription.objects.filter(user=request.user).values_list("course_id", flat=True)
+        return Response({"added": sorted(added), "removed": sorted(removed), "courses": sorted(courses)})
+
+
 # =====================================================
 # PAYMENT SUCCESS / CANCEL TEMPLATES
 # =====================================================
@@ -162,17 +553,28 @@ class PaymentCancelView(LoginRequiredMixin, TemplateView):
 # =====================================================
 
 class PaymentViewSet(viewsets.ModelViewSet):
-    """CRUD и операции с платежами через Stripe"""
+    """
+    CRUD и операции с платежами через Stripe.
+
+    Пользователь видит только свои платежи (индекс payment_user_date_idx),
+    модератор — все.
+    """
 
     queryset = Payment.objects.select_related("user", "course", "lesson").all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
 
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PaymentSearchFilter]
     filterset_fields = ["course", "lesson", "user"]
     ordering_fields = ["payment_date"]
     search_fields = ["user__username", "user__email"]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if not is_moderator(self.request):
+            qs = qs.filter(user=self.request.user)
+        return qs
+
     def get_serializer_class(self):
         if self.action == "create_payment":
             return CreatePaymentSerializer
@@ -180,9 +582,67 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return PaymentStatusSerializer
         return PaymentSerializer
 
+    @staticmethod
+    def use_async_checkout(request):
+        """Асинхронный режим: настройка STRIPE_ASYNC_CHECKOUT или заголовок Prefer: respond-async"""
+        prefer = request.headers.get("Prefer", "")
+        return settings.STRIPE_ASYNC_CHECKOUT or "respond-async" in prefer.lower()
+
+    @staticmethod
+    def find_reusable_payment(user, course, lesson, amount, idempotency_key=None):
+        """
+        Платёж, который можно вернуть вместо создания нового.
+
+        Сначала ищется платёж с тем же Idempotency-Key, затем — ожидающий оплаты
+        платёж со ссылкой Stripe на тот же курс или урок и ту же сумму не старше
+        PAYMENT_REUSE_WINDOW секунд. Платёж без ссылки (сессия ещё создаётся или
+        фоновая задача потеряна) не переиспользуется.
+        """
+        payments = Payment.objects.filter(user=user)
+        if idempotency_key:
+            payment = payments.filter(idempotency_key=idempotency_key).first()
+            if payment is not None:
+                return payment
+
+        window = getattr(settings, "PAYMENT_REUSE_WINDOW", 0)
+        if not window:
+            return None
+        return payments.filter(
+            course=course,
+            lesson=lesson,
+            payment_status="pending",
+            payment_price=amount,
+            stripe_payment_url__isnull=False,
+            payment_date__gte=timezone.now() - timedelta(seconds=window),
+        ).first()
+
+    @staticmethod
+    def payment_response(request, payment, created):
+        """Ссылка на оплату или 202 Accepted, пока сессия Stripe создаётся в фоне"""
+        if payment.stripe_payment_url or payment.payment_status != "pending":
+            return Response(
+                {"id": payment.id, "payment_url": payment.stripe_payment_url, "status": payment.payment_status},
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            )
+
+        status_url = request.build_absolute_uri(reverse("payment-detail", args=[payment.id]))
+        response = Response(
+            {"id": payment.id, "payment_url": None, "status": payment.payment_status, "status_url": status_url},
+            status=status.HTTP_202_ACCEPTED,
+        )
+        response["Location"] = status_url
+        return response
+
     @action(detail=False, methods=["post"])
     def create_payment(self, request):
-        """Создание платежа через Stripe"""
+        """
+        Создание платежа через Stripe.
+
+        В асинхронном режиме платёж создаётся сразу и возвращается 202 Accepted,
+        а сессия Stripe создаётся в фоне; payment_url появляется в GET /api/payments/<id>/.
+        Повтор запроса с тем же заголовком Idempotency-Key или недавний ожидающий
+        платёж за тот же курс или урок возвращают уже созданный платёж.
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -194,55 +654,100 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
         item = course or lesson
         amount = getattr(item, "price", 0)
+        success_url = request.build_absolute_uri("/payment/success/")
+        cancel_url = request.build_absolute_uri("/payment/cancel/")
+
+        idempotency_key = request.headers.get("Idempotency-Key") or None
+        payment = self.find_reusable_payment(request.user, course, lesson, amount, idempotency_key)
+        if payment is not None:
+            if (payment.course_id, payment.lesson_id) != (getattr(course, "pk", None), getattr(lesson, "pk", None)):
+                return Response(
+                    {"error": "Ключ Idempotency-Key уже использован для другого платежа"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return self.payment_response(request, payment, created=False)
 
         try:
-            payment = Payment.objects.create(
-                user=request.user,
-                course=course,
-                lesson=lesson,
-                payment_price=amount,
-                payment_status="pending",
-            )
-
-            stripe_service = StripeService()
-            description = f"Курс: {course.name}" if course else f"Урок: {lesson.name}"
-
-            product = stripe_service.create_product(name=item.name, description=description)
-            payment.stripe_product_id = product.id
-
-            price = stripe_service.create_price(product_id=product.id, price=int(amount))
-
-            session_id, payment_url = stripe_service.create_session(
-                price_id=price.id,
-                success_url=request.build_absolute_uri("/payment/success/"),
-                cancel_url=request.build_absolute_uri("/payment/cancel/"),
-                customer_email=request.user.email,
-            )
-
-            payment.stripe_payment_id = session_id
-            payment.stripe_payment_url = payment_url
-            payment.save()
-
-            return Response(
-                {"id": payment.id, "payment_url": payment_url, "status": payment.payment_status},
-                status=status.HTTP_201_CREATED,
-            )
+            with transaction.atomic():
+                payment = Payment.objects.create(
+                    user=request.user,
+                    course=course,
+                    lesson=lesson,
+                    payment_price=amount,
+                    payment_status="pending",
+                    idempotency_key=idempotency_key,
+                )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел создать платёж
+            payment = Payment.objects.get(user=request.user, idempotency_key=idempotency_key)
+            return self.payment_response(request, payment, created=False)
+
+        # Ключи Stripe общие для всего аккаунта — добавляем пользователя
+        stripe_idempotency_key = f"checkout-session:{request.user.pk}:{idempotency_key}" if idempotency_key else None
+
+        if self.use_async_checkout(request):
+            enqueue(create_checkout_session, payment.id, success_url, cancel_url, stripe_idempotency_key)
+            return self.payment_response(request, payment, created=True)
 
+        try:
+            start_checkout_session(payment, success_url, cancel_url, stripe_idempotency_key)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.payment_response(request, payment, created=True)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated, IsModerator])
+    def revenue(self, request):
+        """
+        Выручка за период по сводной таблице RevenueSummary.
+
+        ?date_from=&date_to= — границы периода включительно,
+        ?group_by=day|item|day_item — группировка по дням, по курсам и урокам или по обоим.
+        """
+        params = RevenueReportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        date_from = params.validated_data["date_from"]
+        date_to = params.validated_data["date_to"]
+        group_by = params.validated_data["group_by"]
+
+        rows = RevenueSummary.objects.filter(day__range=(date_from, date_to))
+        fields = RevenueReportSerializer.GROUP_BY_FIELDS[group_by]
+        results = list(
+            rows.order_by(*fields).values(*fields).annotate(payments_count=Sum("payments_count"), amount=Sum("amount"))
+        )
+        total = rows.aggregate(payments_count=Sum("payments_count"), amount=Sum("amount"))
+
+        return Response(
+            {
+                "date_from": date_from,
+                "date_to": date_to,
+                "group_by": group_by,
+                "total": {"payments_count": total["payments_count"] or 0, "amount": total["amount"] or 0},
+                "results": results,
+            }
+        )
 
     @action(detail=True, methods=["get"])
     def check_status(self, request, pk=None):
         """Проверка статуса платежа"""
         payment = self.get_object()
+
+        # Статусы приходят вебхуком, завершённый платёж уже не изменится,
+        # а без сессии спрашивать Stripe не о чем — отвечаем из локальной записи
+        if (
+            settings.STRIPE_WEBHOOK_SECRET
+            or payment.payment_status in PAYMENT_TERMINAL_STATUSES
+            or not payment.stripe_payment_id
+        ):
+            return Response(self.get_serializer(payment).data)
+
         stripe_service = StripeService()
 
         try:
-            new_status = stripe_service.get_payment_status(payment.stripe_payment_id)
+            new_status = stripe_service.get_cached_payment_status(payment.stripe_payment_id)
 
             if new_status != payment.payment_status:
                 payment.payment_status = new_status
-                payment.save()
+                payment.save(update_fields=["payment_status"])
 
             serializer = self.get_serializer(payment)
             return Response(serializer.data)
@@ -250,3 +755,43 @@ class PaymentViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+
+# =====================================================
+# STRIPE WEBHOOK
+# =====================================================
+
+@api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def stripe_webhook(request):
+    """
+    Вебхук Stripe: обновление статуса платежа по событиям checkout.session.*
+
+    Подпись проверяется по STRIPE_WEBHOOK_SECRET, обработанные события
+    запоминаются, поэтому повторная доставка не меняет данные.
+    """
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        return Response({"error": "Вебхук Stripe не настроен"}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        event = StripeService.construct_event(request.body, request.META.get("HTTP_STRIPE_SIGNATURE", ""))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    session = event["data"]["object"]
+    new_status = StripeService.get_event_status(event["type"], session)
+
+    with transaction.atomic():
+        _, created = StripeEvent.objects.get_or_create(
+            event_id=event["id"], defaults={"event_type": event["type"]}
+        )
+        if created and new_status:
+            # save() по строкам под блокировкой: сигнал обновляет сводку выручки ровно один раз
+            payments = Payment.objects.select_for_update().filter(stripe_payment_id=session["id"]).exclude(
+                payment_status=new_status
+            )
+            for payment in payments:
+                payment.payment_status = new_status
+                payment.save(update_fields=["payment_status"])
+
+    return Response({"received": True})
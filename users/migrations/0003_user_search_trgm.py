@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:00
+
+from django.db import migrations
+
+# Триграммные индексы для поиска платежей по пользователю (lms.filters.PaymentSearchFilter).
+# Выражение совпадает с тем, что Django строит для icontains: UPPER(col::text) LIKE ...
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS users_user_username_trgm ON users_user USING gin (upper(username) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS users_user_email_trgm ON users_user USING gin (upper(email) gin_trgm_ops)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS users_user_username_trgm",
+    "DROP INDEX IF EXISTS users_user_email_trgm",
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_CREATE:
+            schema_editor.execute(sql)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_DROP:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_payment'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,11 +1,11 @@
 from rest_framework.permissions import BasePermission
 
+from .roles import is_moderator
+
 
 class IsModerator(BasePermission):
     def has_permission(self, request, view):
-        if request.user.is_authenticated:
-            return request.user.groups.filter(name="Moderators").exists()
-        return False
+        return is_moderator(request)
 
     def has_object_permission(self, request, view, obj):
         # Mirror the same logic for object-level checks so that
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+
+MODERATORS_GROUP = "Moderators"
+
+
+def _cache_key(user_id):
+    return f"users:is_moderator:{user_id}"
+
+
+def is_moderator(request) -> bool:
+    """
+    Проверка, входит ли пользователь запроса в группу модераторов.
+
+    Результат запоминается на объекте запроса, поэтому составные права
+    (IsModerator | IsOwner) и get_queryset выполняют не больше одного запроса к БД.
+    Если задан USERS_ROLE_CACHE_TIMEOUT, значение дополнительно хранится в кэше
+    между запросами и сбрасывается сигналом m2m_changed на User.groups.
+    """
+    cached = getattr(request, "_is_moderator", None)
+    if cached is not None:
+        return cached
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+
+    timeout = getattr(settings, "USERS_ROLE_CACHE_TIMEOUT", 0)
+    value = cache.get(_cache_key(user.pk)) if timeout else None
+    if value is None:
+        value = user.groups.filter(name=MODERATORS_GROUP).exists()
+        if timeout:
+            cache.set(_cache_key(user.pk), value, timeout)
+
+    request._is_moderator = value
+    return value
+
+
+def invalidate_role_cache(user_ids):
+    """Сброс кэша ролей для указанных пользователей."""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
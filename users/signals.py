@@ -0,0 +1,20 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import User
+from .roles import invalidate_role_cache
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def reset_role_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """Сброс кэша ролей при изменении групп пользователя (с любой стороны связи)."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = list(instance.user_set.values_list("pk", flat=True))
+    else:
+        user_ids = pk_set or []
+    invalidate_role_cache(user_ids)
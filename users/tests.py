@@ -1,3 +1,56 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
 
-# Create your tests here.
+from .models import User
+from .roles import is_moderator
+
+
+class ModeratorRoleCacheTests(TestCase):
+    """Тесты кэширования роли модератора"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="user", email="user@example.com", password="pass1234"
+        )
+        self.group, _ = Group.objects.get_or_create(name="Moderators")
+
+    def _request(self):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.user
+        return request
+
+    def test_role_is_resolved_once_per_request(self):
+        """Повторные проверки в рамках запроса не обращаются к БД"""
+        request = self._request()
+        with self.assertNumQueries(1):
+            self.assertFalse(is_moderator(request))
+            self.assertFalse(is_moderator(request))
+            self.assertFalse(is_moderator(request))
+
+    @override_settings(USERS_ROLE_CACHE_TIMEOUT=60)
+    def test_cross_request_cache(self):
+        """Между запросами роль берётся из кэша"""
+        is_moderator(self._request())
+        with self.assertNumQueries(0):
+            self.assertFalse(is_moderator(self._request()))
+
+    @override_settings(USERS_ROLE_CACHE_TIMEOUT=60)
+    def test_cache_invalidated_on_group_change(self):
+        """Изменение групп пользователя сбрасывает кэш"""
+        self.assertFalse(is_moderator(self._request()))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(is_moderator(self._request()))
+
+        self.group.user_set.remove(self.user)
+        self.assertFalse(is_moderator(self._request()))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(is_moderator(self._request()))
+
+        self.group.user_set.clear()
+        self.assertFalse(is_moderator(self._request()))